@@ -1,48 +1,254 @@
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, AsyncIterator
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import hashlib
+import os
+import threading
 from langchain_core.tools import tool  
 from langchain.agents import create_tool_calling_agent, AgentExecutor  
+from langchain.agents.agent import RunnableMultiActionAgent
+from langchain_core.agents import AgentAction, AgentFinish
 from langchain_core.prompts import ChatPromptTemplate  
 from langchain_google_genai import ChatGoogleGenerativeAI  
-from utils.advanced_analyzer import AdvancedDataAnalyzer, PythonCodeExecutor  
+from pydantic import BaseModel
+from utils.advanced_analyzer import AdvancedDataAnalyzer, PythonCodeExecutor, schema_bytes  
 from memory.enhanced_memory import EnhancedSessionMemory  
+from config import get_settings
+import numpy as np
 import pandas as pd  
 import plotly.graph_objects as go
 import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Keyword scans compiled once at import time (substring semantics, like the former `in` checks)
+_INSIGHT_RE = re.compile(r'insight:|descoberta:|padrão:|encontrado:|identificado:', re.IGNORECASE)
+_RECOMMENDATION_RE = re.compile(r'recomenda', re.IGNORECASE)
+# Candidate lines for extraction: bullets, insight keywords or the recommendations anchor
+_EXTRACT_RE = re.compile(
+    r'^(?P<bullet>[^\S\n]*-)?(?:.*?(?P<keyword>insight:|descoberta:|padrão:|encontrado:|identificado:|recomenda))?.*$',
+    re.IGNORECASE | re.MULTILINE
+)
+# Ordered: the first matching category wins
+_ANALYSIS_TYPE_PATTERNS = [
+    ('conclusions', re.compile(r'conclus|aprend|resumo geral|insights gerais', re.IGNORECASE)),
+    ('correlation', re.compile(r'correlação|relação|correlation|relaciona', re.IGNORECASE)),
+    ('outlier', re.compile(r'outlier|anomalia|atípico|anomal', re.IGNORECASE)),
+    ('clustering', re.compile(r'cluster|agrupamento|grupo|segmenta', re.IGNORECASE)),
+    ('temporal', re.compile(r'tempo|temporal|tendência|time|trend', re.IGNORECASE)),
+    ('distribution', re.compile(r'distribuição|histograma|distribution|histogram', re.IGNORECASE)),
+    ('summary', re.compile(r'tipo|types|describe|resumo|summary', re.IGNORECASE)),
+]
+
+# Whole-question match for bare summary requests, which the precomputed data summary fully answers;
+# anything more specific (a column, a filter, a grouping) still goes to the agent
+_BARE_SUMMARY_RE = re.compile(
+    r'^\s*(?:por favor,?\s*)?(?:(?:fa[çc]a|me d[êe]|mostre|gere|d[êe])(?:\s+(?:me|um|o))*\s+)?'
+    r'(?:resumo|summary|describe|summarize'
+    r'|(?:quais\s+(?:s[ãa]o\s+)?)?os\s+tipos\s+de\s+dados|tipos\s+de\s+dados|data\s*types|types)'
+    r'(?:\s+(?:d[oa]s?|of\s+the|the)\s+(?:dados|dataset|base|data|colunas|columns|vari[áa]veis))?'
+    r'(?:[\s,]+por\s+favor)?\W*$',
+    re.IGNORECASE
+)
+
+# Prompt and tool argument schemas are the same for every EDAAgent; build them once
+_SYSTEM_PROMPT = """Você é um agente especialista em Análise Exploratória de Dados (EDA).
+Ferramentas: data_summary (use primeiro); correlation|outlier|clustering|temporal|distribution (geram gráficos); python (código customizado); memory_summary (análises anteriores); generate_conclusions (conclusões consolidadas).
+Regras:
+1. Conclusões, tendências gerais ou "o que você aprendeu" → SEMPRE generate_conclusions; apresente padrões, descobertas e recomendações práticas.
+2. Distribuição/histogramas → distribution_analysis_tool.
+3. Análises independentes pedidas juntas → TODAS as chamadas numa ÚNICA resposta (chamadas paralelas), nunca em turnos separados.
+4. Se uma ferramenta gerar gráficos, diga "Gráfico gerado".
+5. Seja específico; dê insights acionáveis e recomendações baseadas em evidências."""
+
+_PROMPT_TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", _SYSTEM_PROMPT),
+    ("human", "{input}"),
+    ("placeholder", "{agent_scratchpad}")
+])
+
+class _PythonArgs(BaseModel):
+    code: str
+
+class _CorrelationArgs(BaseModel):
+    method: str = "pearson"
+    threshold: float = 0.5
+
+class _OutlierArgs(BaseModel):
+    method: str = "iqr"
+
+class _ClusteringArgs(BaseModel):
+    n_clusters: int = 3
+    method: str = "kmeans"
+
+class _TemporalArgs(BaseModel):
+    time_column: str = None
+
+class _DistributionArgs(BaseModel):
+    column: str = None
+
+class _NoArgs(BaseModel):
+    pass
+
+# Plot sink of the analysis running in the current context; None outside _stream (e.g. direct tool calls)
+_run_plots: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("_run_plots", default=None)
+
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_event_loop_lock = threading.Lock()
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the background event loop used to run the async agent from sync callers"""
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(target=_event_loop.run_forever, name="eda-agent-loop", daemon=True).start()
+    return _event_loop
+
+# Blocking pandas/sklearn work runs here instead of the loop's default executor; shared by
+# all agents so per-upload instances don't each spawn their own threads
+_analyzer_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 4, thread_name_prefix="eda-analyzer"
+)
+
+# Final-answer request used when the model only repeats earlier tool calls
+_SYNTHESIS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", _SYSTEM_PROMPT),
+    ("human", "{input}\n\nResultados das ferramentas já executadas:\n\n{results}\n\n"
+              "Com base apenas nesses resultados, escreva agora a resposta final ao usuário.")
+])
+
+class _RepeatGuardAgent(RunnableMultiActionAgent):
+    """Tool-calling agent that answers from the steps so far when its plan only repeats earlier calls"""
+    
+    llm: Any
+    
+    @staticmethod
+    def _call_key(action: AgentAction) -> Tuple[str, str]:
+        return action.tool, json.dumps(action.tool_input, sort_keys=True, default=str)
+    
+    def _only_repeats(self, output, intermediate_steps: List[Tuple[AgentAction, str]]) -> bool:
+        """Whether a planned step is made only of (tool, args) calls that already ran"""
+        if isinstance(output, AgentFinish) or not output:
+            return False
+        seen = {self._call_key(action) for action, _ in intermediate_steps}
+        return all(self._call_key(action) in seen for action in output)
+    
+    def _synthesis_messages(self, intermediate_steps: List[Tuple[AgentAction, str]], **kwargs):
+        results = "\n\n".join(f"[{action.tool}]\n{observation}" for action, observation in intermediate_steps)
+        return _SYNTHESIS_PROMPT.format_messages(input=kwargs["input"], results=results)
+    
+    def plan(self, intermediate_steps, callbacks=None, **kwargs):
+        output = super().plan(intermediate_steps, callbacks=callbacks, **kwargs)
+        if not self._only_repeats(output, intermediate_steps):
+            return output
+        # Checked before execution, so repeated tools (e.g. user code) never run again
+        message = self.llm.invoke(self._synthesis_messages(intermediate_steps, **kwargs), config={"callbacks": callbacks})
+        return AgentFinish({"output": message.content}, log="Repeated tool calls, answering from previous results")
+    
+    async def aplan(self, intermediate_steps, callbacks=None, **kwargs):
+        output = await super().aplan(intermediate_steps, callbacks=callbacks, **kwargs)
+        if not self._only_repeats(output, intermediate_steps):
+            return output
+        message = await self.llm.ainvoke(self._synthesis_messages(intermediate_steps, **kwargs), config={"callbacks": callbacks})
+        return AgentFinish({"output": message.content}, log="Repeated tool calls, answering from previous results")
+
+@functools.lru_cache(maxsize=8)
+def _get_llm(model: str, api_key: str) -> ChatGoogleGenerativeAI:
+    """Shared Gemini client per (model, key), so its gRPC channels are reused across agents"""
+    return ChatGoogleGenerativeAI(  
+        model=model,
+        google_api_key=api_key,  
+        temperature=0.1  
+    )
 
 class EDAAgent:  
     """Enhanced EDA Agent with LangChain integration and visualization support"""  
       
-    def __init__(self, df: pd.DataFrame, api_key: str):  
+    def __init__(self, df: pd.DataFrame, api_key: str, max_concurrency: int = 4, debug: bool = False):  
         self.df = df  
-        self.analyzer = AdvancedDataAnalyzer(df)  
-        self.memory = EnhancedSessionMemory()  
+        self.debug = debug  
+        self.memory = self._create_memory()
         self.code_executor = PythonCodeExecutor()
         self.generated_plots = {}  # Store plots for display
+        self.last_result: Optional[Dict[str, Any]] = None
+        
+        # Analyzer tools are pure functions of (df, args): memoize them by a content fingerprint
+        # One row-hash pass feeds both the fingerprint and the duplicate count in the summary
+        row_hashes = pd.util.hash_pandas_object(self._zero_signed_floats(df), index=False).to_numpy()
+        self._duplicate_count = len(row_hashes) - len(np.unique(row_hashes))
+        fingerprint = hashlib.blake2b(row_hashes.tobytes(), digest_size=16)
+        fingerprint.update(pd.util.hash_pandas_object(df.index).to_numpy().tobytes())
+        # Row hashes ignore headers and types: renamed or swapped columns must not share cache entries
+        fingerprint.update(schema_bytes(df))
+        self._df_hash = fingerprint.hexdigest()
+        # The same fingerprint keys the analyzer's on-disk kernel cache
+        settings = get_settings()
+        self.analyzer = AdvancedDataAnalyzer(
+            df, cache_dir=settings.analysis_cache_dir, df_hash=self._df_hash,
+            cache_bytes_limit=settings.analysis_cache_max_mb << 20
+        )
+        self._numeric_cols = list(self.analyzer.numeric_columns)
+        self._categorical_cols = list(self.analyzer.categorical_columns)
+        self._tool_cache: Dict[tuple, Dict[str, Any]] = {}
+        self._summary_cache = self._build_data_summary()
+        
+        # Async primitives are bound lazily to the loop running the tools
+        self.max_concurrency = max_concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._plots_lock: Optional[asyncio.Lock] = None
+        self._tool_semaphore: Optional[asyncio.Semaphore] = None
           
-        # Initialize LLM
-        try:
-            self.llm = ChatGoogleGenerativeAI(  
-                model="gemini-2.5-pro",
-                google_api_key=api_key,  
-                temperature=0.1  
-            )
-        except Exception as e:
-            raise Exception(f"Erro ao inicializar Gemini: {str(e)}")
+        # LLMs and agents are created lazily on first analyze(), see the cached properties below
+        self._api_key = api_key
           
         # Create tools  
         self.tools = self._create_tools()  
-          
-        # Create agent  
-        self.agent = self._create_agent()  
+    
+    @functools.cached_property
+    def llm_fast(self) -> ChatGoogleGenerativeAI:
+        """Fast model that drives tool dispatch"""
+        return self._create_llm("gemini-2.5-flash")
+    
+    @functools.cached_property
+    def llm_pro(self) -> ChatGoogleGenerativeAI:
+        """Pro model reserved for consolidated conclusions (final synthesis)"""
+        return self._create_llm("gemini-2.5-pro")
+    
+    @functools.cached_property
+    def agent(self) -> AgentExecutor:
+        """Default tool-calling agent"""
+        return self._create_agent(self.llm_fast)
+    
+    @functools.cached_property
+    def synthesis_agent(self) -> AgentExecutor:
+        """Agent used for conclusion questions"""
+        return self._create_agent(self.llm_pro)
+    
+    def _create_llm(self, model: str) -> ChatGoogleGenerativeAI:
+        """Initialize (or reuse) a Gemini chat model"""
+        try:
+            return _get_llm(model, self._api_key)
+        except Exception as e:
+            raise Exception(f"Erro ao inicializar Gemini: {str(e)}")
       
     def _create_tools(self) -> List:  
         """Create analysis tools for the agent"""  
           
-        @tool  
-        def python_analysis_tool(code: str) -> str:  
+        @tool(args_schema=_PythonArgs)
+        async def python_analysis_tool(code: str) -> str:  
             """Execute Python code for data analysis. Use for custom analysis and visualizations.
             The dataframe is available as 'df'. Use plotly for visualizations."""  
-            result = self.code_executor.execute(code, {'df': self.df})  
+            self._bind_loop_primitives()
+            async with self._tool_semaphore:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    _analyzer_pool, self.code_executor.execute, code, {'df': self.df}
+                )
               
             if result['success']:  
                 # Check if any plots were created
@@ -53,79 +259,42 @@ class EDAAgent:
             else:  
                 return f"Error executing code: {result['error']}"  
           
-        @tool  
-        def correlation_analysis_tool(method: str = "pearson", threshold: float = 0.5) -> str:  
+        @tool(args_schema=_CorrelationArgs)
+        async def correlation_analysis_tool(method: str = "pearson", threshold: float = 0.5) -> str:  
             """Analyze correlations between numeric variables. Returns analysis text and generates correlation heatmap."""  
-            result = self.analyzer.correlation_analysis_tool(method, threshold)  
-            # Store plots for later display
-            if result.get('plots'):
-                self.generated_plots.update(result['plots'])
-            return result['analysis']  
+            return await self._run_analyzer(self.analyzer.correlation_analysis_tool, method, threshold)
           
-        @tool  
-        def outlier_detection_tool(method: str = "iqr") -> str:  
+        @tool(args_schema=_OutlierArgs)
+        async def outlier_detection_tool(method: str = "iqr") -> str:  
             """Detect outliers in numeric variables using IQR or zscore methods. Generates boxplots."""  
-            result = self.analyzer.outlier_detection_tool(method)
-            if result.get('plots'):
-                self.generated_plots.update(result['plots'])
-            return result['analysis']  
+            return await self._run_analyzer(self.analyzer.outlier_detection_tool, method)
           
-        @tool  
-        def clustering_analysis_tool(n_clusters: int = 3, method: str = "kmeans") -> str:  
+        @tool(args_schema=_ClusteringArgs)
+        async def clustering_analysis_tool(n_clusters: int = 3, method: str = "kmeans") -> str:  
             """Perform clustering analysis. Generates scatter plot of clusters."""  
-            result = self.analyzer.clustering_analysis_tool(n_clusters, method)
-            if result.get('plots'):
-                self.generated_plots.update(result['plots'])
-            return result['analysis']  
+            return await self._run_analyzer(self.analyzer.clustering_analysis_tool, n_clusters, method)
           
-        @tool  
-        def temporal_analysis_tool(time_column: str = None) -> str:  
+        @tool(args_schema=_TemporalArgs)
+        async def temporal_analysis_tool(time_column: str = None) -> str:  
             """Analyze temporal patterns. Generates time series plots."""  
-            result = self.analyzer.temporal_analysis_tool(time_column)
-            if result.get('plots'):
-                self.generated_plots.update(result['plots'])
-            return result['analysis']
+            return await self._run_analyzer(self.analyzer.temporal_analysis_tool, time_column)
         
-        @tool
-        def distribution_analysis_tool(column: str = None) -> str:
+        @tool(args_schema=_DistributionArgs)
+        async def distribution_analysis_tool(column: str = None) -> str:
             """Analyze distribution of variables. Generates histograms and distribution plots."""
-            result = self.analyzer.distribution_analysis_tool(column)
-            if result.get('plots'):
-                self.generated_plots.update(result['plots'])
-            return result['analysis']
+            return await self._run_analyzer(self.analyzer.distribution_analysis_tool, column)
           
-        @tool  
+        @tool(args_schema=_NoArgs)
         def data_summary_tool() -> str:  
             """Get a comprehensive summary of the dataset including types, statistics, and data quality."""  
-            summary = f"""  
-## Resumo do Dataset  
-  
-**Dimensões:** {self.df.shape[0]} linhas × {self.df.shape[1]} colunas  
-
-**Colunas do Dataset:**
-{', '.join(self.df.columns.tolist())}
-
-**Tipos de Variáveis:**  
-- Numéricas: {len(self.analyzer.numeric_columns)} colunas
-  Colunas: {', '.join(self.analyzer.numeric_columns[:10])}
-- Categóricas: {len(self.analyzer.categorical_columns)} colunas
-  Colunas: {', '.join(self.analyzer.categorical_columns[:10])}
-  
-**Qualidade dos Dados:**  
-- Valores nulos: {self.df.isnull().sum().sum()} ({(self.df.isnull().sum().sum() / (self.df.shape[0] * self.df.shape[1]) * 100):.2f}%)
-- Duplicatas: {self.df.duplicated().sum()}  
-  
-**Estatísticas Básicas das Variáveis Numéricas:**  
-{self.df.describe().to_string()}  
-            """  
-            return summary  
+            return self._summary_cache  
           
-        @tool  
+        @tool(args_schema=_NoArgs)
         def memory_summary_tool() -> str:  
             """Get a summary of all previous analyses and generate consolidated conclusions."""  
             return self.memory.generate_summary()
         
-        @tool
+        @tool(args_schema=_NoArgs)
         def generate_conclusions_tool() -> str:
             """Generate comprehensive conclusions based on all analyses performed in this session."""
             return self.memory.generate_comprehensive_conclusions()
@@ -141,70 +310,136 @@ class EDAAgent:
             memory_summary_tool,
             generate_conclusions_tool
         ]  
-      
-    def _create_agent(self) -> AgentExecutor:  
-        """Create the LangChain agent with tools"""  
-        system_prompt = """  
-Você é um agente especialista em Análise Exploratória de Dados (EDA) com capacidades avançadas.  
-  
-Suas principais habilidades incluem:  
-- Análise estatística descritiva e inferencial  
-- Detecção de outliers e anomalias  
-- Análise de correlações e relacionamentos entre variáveis
-- Clustering e segmentação de dados  
-- Análise temporal e de tendências  
-- Análise de distribuições
-- Geração de visualizações interativas  
-- Execução de código Python personalizado  
+    
+    @staticmethod
+    def _zero_signed_floats(df: pd.DataFrame) -> pd.DataFrame:
+        """Replace -0.0 by 0.0 so row hashes treat them as equal, like df.duplicated() does"""
+        fixed = df
+        for i, dtype in enumerate(df.dtypes):
+            if dtype.kind != 'f':
+                continue
+            values = df.iloc[:, i].to_numpy()
+            if np.signbit(values[values == 0]).any():
+                if fixed is df:
+                    fixed = df.copy(deep=False)
+                fixed.isetitem(i, df.iloc[:, i] + 0.0)
+        return fixed
+    
+    def _build_data_summary(self) -> str:
+        """Build the data_summary_tool text; the dataframe is immutable, so this runs once"""
+        # Single vectorized pass over the null mask instead of a per-column reduction
+        null_count = int(self.df.isna().to_numpy().sum())
+        null_pct = null_count / (self.df.shape[0] * self.df.shape[1]) * 100 if self.df.size else 0.0
+        summary = f"""  
+## Resumo do Dataset  
   
-Você tem acesso às seguintes ferramentas:  
-- data_summary_tool: Para resumo completo dos dados (USE PRIMEIRO para entender o dataset)
-- correlation_analysis_tool: Para análise de correlações (GERA GRÁFICOS)
-- outlier_detection_tool: Para detecção de outliers (GERA GRÁFICOS)
-- clustering_analysis_tool: Para análise de agrupamentos (GERA GRÁFICOS)
-- temporal_analysis_tool: Para análise temporal (GERA GRÁFICOS)
-- distribution_analysis_tool: Para análise de distribuições (GERA GRÁFICOS)
-- python_analysis_tool: Para código Python customizado e visualizações especiais
-- memory_summary_tool: Para acessar análises anteriores  
-- generate_conclusions_tool: Para gerar conclusões consolidadas de todas as análises
+**Dimensões:** {self.df.shape[0]} linhas × {self.df.shape[1]} colunas  
 
-IMPORTANTE:
-1. Para perguntas sobre conclusões, SEMPRE use generate_conclusions_tool
-2. Sempre que uma ferramenta gerar gráficos, mencione "Gráfico gerado" na resposta
-3. Use data_summary_tool para entender o dataset antes de análises complexas
-4. Para questões sobre distribuição, histogramas, use distribution_analysis_tool
-5. Forneça insights acionáveis e recomendações baseadas em evidências
-6. Mantenha contexto das análises anteriores usando memory_summary_tool
-7. Seja específico e detalhado nas respostas
+**Colunas do Dataset:**
+{', '.join(self.df.columns.tolist())}
 
-Quando perguntarem sobre conclusões, tendências gerais ou "o que você aprendeu":
-- Use generate_conclusions_tool para consolidar todos os insights
-- Apresente padrões identificados
-- Destaque descobertas importantes
-- Forneça recomendações práticas
+**Tipos de Variáveis:**  
+- Numéricas: {len(self._numeric_cols)} colunas
+  Colunas: {', '.join(self._numeric_cols[:10])}
+- Categóricas: {len(self._categorical_cols)} colunas
+  Colunas: {', '.join(self._categorical_cols[:10])}
+  
+**Qualidade dos Dados:**  
+- Valores nulos: {null_count} ({null_pct:.2f}%)
+- Duplicatas: {self._duplicate_count}  
+  
+**Estatísticas Básicas das Variáveis Numéricas:**  
+{self.df.describe().to_string()}  
         """  
-          
-        prompt = ChatPromptTemplate.from_messages([  
-            ("system", system_prompt),  
-            ("human", "{input}"),  
-            ("placeholder", "{agent_scratchpad}")  
-        ])  
-          
-        agent = create_tool_calling_agent(self.llm, self.tools, prompt)  
+        return summary
+    
+    def _bind_loop_primitives(self) -> None:
+        """(Re)create the asyncio lock and semaphore for the currently running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._plots_lock = asyncio.Lock()
+            self._tool_semaphore = asyncio.Semaphore(self.max_concurrency)
+    
+    async def _run_analyzer(self, analyzer_method, *args) -> str:
+        """Run (or reuse the memoized result of) a blocking analyzer method and collect its plots"""
+        self._bind_loop_primitives()
+        key = (analyzer_method.__name__, self._df_hash, *args)
+        result = self._tool_cache.get(key)
+        if result is None:
+            async with self._tool_semaphore:
+                result = await asyncio.get_running_loop().run_in_executor(_analyzer_pool, analyzer_method, *args)
+            self._tool_cache[key] = result
+        # Store plots (also on cache hits, so repeated questions still display them) for later display
+        if result.get('plots'):
+            plots = _run_plots.get()
+            async with self._plots_lock:
+                (self.generated_plots if plots is None else plots).update(result['plots'])
+        return result['analysis']
+      
+    @staticmethod
+    def _create_memory() -> EnhancedSessionMemory:
+        """Session memory sized by the configured history limit"""
+        return EnhancedSessionMemory(max_interactions=get_settings().max_memory_interactions_summary)
+      
+    def _create_agent(self, llm: ChatGoogleGenerativeAI) -> AgentExecutor:  
+        """Create the LangChain agent with tools"""  
+        # Gemini's default AUTO function calling already allows several calls per turn;
+        # the system prompt asks the model to batch independent analyses that way
+        agent = create_tool_calling_agent(llm, self.tools, _PROMPT_TEMPLATE)
+        # A plan that only repeats earlier calls is turned into a final answer before anything runs
         return AgentExecutor(
-            agent=agent, 
+            agent=_RepeatGuardAgent(runnable=agent, llm=llm, stream_runnable=True), 
             tools=self.tools, 
-            verbose=True, 
+            verbose=self.debug,  # LangChain's verbose output is blocking print() on every step
             max_iterations=10,  # Increased for complex analyses
             handle_parsing_errors=True
         )  
       
     def analyze(self, question: str) -> Dict[str, Any]:  
-        """Main analysis method that uses the agent"""  
+        """Main analysis method that uses the agent (blocking wrapper around analyze_async)"""  
+        future = asyncio.run_coroutine_threadsafe(self.analyze_async(question), _get_event_loop())
+        return future.result()
+    
+    async def analyze_async(self, question: str) -> Dict[str, Any]:
+        """Async analysis; independent tool calls in one turn run concurrently.
+        
+        Gemini's async gRPC channel is bound to the event loop that first uses it, so
+        always drive a given agent from the same loop (analyze() uses a shared one).
+        """
+        async for _ in self.analyze_stream(question):
+            pass
+        return self.last_result
+    
+    async def analyze_many(self, questions: List[str], concurrency: int = 4) -> List[Dict[str, Any]]:
+        """Analyze several questions concurrently; results come back in question order"""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def analyze_one(question: str) -> Dict[str, Any]:
+            result: Dict[str, Any] = {}
+            async with semaphore:
+                async for _ in self._stream(question, result):
+                    pass
+            return result
+        
+        return await asyncio.gather(*(asyncio.create_task(analyze_one(q)) for q in questions))
+    
+    async def analyze_stream(self, question: str) -> AsyncIterator[str]:
+        """Stream the answer text as the model generates it.
+        
+        Once the stream is exhausted, the full result (same shape as analyze()) is in self.last_result.
+        """
+        result: Dict[str, Any] = {}
+        async for text in self._stream(question, result):
+            yield text
+        self.last_result = result
+    
+    async def _stream(self, question: str, result: Dict[str, Any]) -> AsyncIterator[str]:
+        """Run one analysis, yielding model tokens and filling result with the analyze() dict"""
+        # Plots produced by this run's tools land here, isolated from concurrent runs
+        plots: Dict[str, Any] = {}
+        token = _run_plots.set(plots)
         try:
-            # Clear previous plots
-            self.generated_plots = {}
-            
             # Get contextual memory  
             relevant_memory = self.memory.get_contextual_memory(question)  
               
@@ -217,82 +452,90 @@ Quando perguntarem sobre conclusões, tendências gerais ou "o que você aprende
               
             enhanced_question = question + context  
               
-            # Execute agent  
-            result = self.agent.invoke({"input": enhanced_question})  
-              
             # Determine analysis type  
             analysis_type = self._determine_analysis_type(question)  
+            logger.debug("Analysis type %s, %d memory entries in context", analysis_type, len(relevant_memory))
+              
+            if analysis_type == 'summary' and _BARE_SUMMARY_RE.match(question):
+                # Plain summary requests are fully answered by data_summary_tool; skip the LLM
+                output = self._summary_cache
+                yield output
+            else:
+                # Execute agent, surfacing model tokens as they arrive
+                agent = self.synthesis_agent if analysis_type == 'conclusions' else self.agent
+                output = ""
+                async for event in agent.astream_events({"input": enhanced_question}, version="v2"):
+                    if event["event"] == "on_chat_model_stream":
+                        text = self._chunk_text(event["data"]["chunk"])
+                        if text:
+                            yield text
+                    elif event["event"] == "on_chain_end" and not event["parent_ids"]:
+                        output = event["data"]["output"]["output"]
               
             # Store in memory  
+            insights, recommendations = self._extract_insights_and_recommendations(output)
             analysis_result = {  
-                'analysis': result['output'],  
-                'plots': self.generated_plots.copy(),
-                'insights': self._extract_insights(result['output']),  
-                'recommendations': self._extract_recommendations(result['output'])
+                'analysis': output,  
+                'plots': plots,
+                'insights': insights,  
+                'recommendations': recommendations
             }  
               
             self.memory.add_analysis(question, analysis_result, analysis_type)  
               
-            return {  
+            result.update({  
                 'success': True,  
-                'analysis': result['output'],  
-                'plots': self.generated_plots.copy(),
+                'analysis': output,  
+                'plots': plots,
                 'analysis_type': analysis_type,  
                 'memory_context': len(relevant_memory)  
-            }  
+            })  
               
         except Exception as e:  
             import traceback
             error_details = traceback.format_exc()
-            return {  
+            result.update({  
                 'success': False,  
                 'error': str(e),  
                 'error_details': error_details,
                 'analysis': f"Erro durante a análise: {e}",
                 'plots': {}
-            }
+            })
+        finally:
+            _run_plots.reset(token)
     
-    def _extract_insights(self, text: str) -> List[str]:
-        """Extract insights from analysis text"""
-        insights = []
-        lines = text.split('\n')
-        for line in lines:
-            if any(keyword in line.lower() for keyword in ['insight:', 'descoberta:', 'padrão:', 'encontrado:', 'identificado:']):
-                insights.append(line.strip())
-        return insights[:5]
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        """Text carried by a streamed message chunk (Gemini may send a list of content parts)"""
+        content = chunk.content
+        if isinstance(content, str):
+            return content
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
     
-    def _extract_recommendations(self, text: str) -> List[str]:
-        """Extract recommendations from analysis text"""
+    def _extract_insights_and_recommendations(self, text: str) -> Tuple[List[str], List[str]]:
+        """Extract insights and recommendations from analysis text in a single pass"""
+        insights = []
         recommendations = []
-        lines = text.split('\n')
         in_rec_section = False
-        for line in lines:
-            if 'recomenda' in line.lower():
+        for match in _EXTRACT_RE.finditer(text):
+            keyword = match.group('keyword')
+            if not keyword and not match.group('bullet'):
+                continue
+            line = match.group(0).strip()
+            if keyword and not in_rec_section and _RECOMMENDATION_RE.search(line):
                 in_rec_section = True
-            if in_rec_section and line.strip().startswith('-'):
-                recommendations.append(line.strip())
-        return recommendations[:5]
+            if keyword and _INSIGHT_RE.search(line):
+                insights.append(line)
+            if in_rec_section and match.group('bullet'):
+                recommendations.append(line)
+        return insights[:5], recommendations[:5]
       
     def _determine_analysis_type(self, question: str) -> str:  
         """Determine the type of analysis based on question"""  
-        question_lower = question.lower()  
-          
-        if any(word in question_lower for word in ['conclus', 'aprend', 'resumo geral', 'insights gerais']):
-            return 'conclusions'
-        elif any(word in question_lower for word in ['correlação', 'relação', 'correlation', 'relaciona']):  
-            return 'correlation'  
-        elif any(word in question_lower for word in ['outlier', 'anomalia', 'atípico', 'anomal']):  
-            return 'outlier'  
-        elif any(word in question_lower for word in ['cluster', 'agrupamento', 'grupo', 'segmenta']):  
-            return 'clustering'  
-        elif any(word in question_lower for word in ['tempo', 'temporal', 'tendência', 'time', 'trend']):  
-            return 'temporal'  
-        elif any(word in question_lower for word in ['distribuição', 'histograma', 'distribution', 'histogram']):  
-            return 'distribution'
-        elif any(word in question_lower for word in ['tipo', 'types', 'describe', 'resumo', 'summary']):
-            return 'summary'
-        else:  
-            return 'general'  
+        for analysis_type, pattern in _ANALYSIS_TYPE_PATTERNS:
+            if pattern.search(question):
+                return analysis_type
+        return 'general'  
       
     def get_analysis_summary(self) -> str:  
         """Get a summary of all analyses performed"""  
@@ -304,4 +547,4 @@ Quando perguntarem sobre conclusões, tendências gerais ou "o que você aprende
       
     def clear_memory(self) -> None:  
         """Clear analysis memory"""  
-        self.memory = EnhancedSessionMemory()
\ No newline at end of file
+        self.memory = self._create_memory()
\ No newline at end of file
@@ -1,11 +1,18 @@
+import hashlib
+import io
+import math
+from collections import deque
+from itertools import islice
 import streamlit as st  
 import pandas as pd  
 import numpy as np  
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from datetime import datetime  
-from typing import Dict, List, Any, Optional  
-import plotly.graph_objects as go
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple
   
-from agents.eda_agent import EDAAgent  
+if TYPE_CHECKING:
+    from agents.eda_agent import EDAAgent
   
 st.set_page_config(  
     page_title="Agente EDA Avançado - Análise Exploratória de Dados",  
@@ -45,15 +52,41 @@ def initialize_session():
         st.session_state.eda_agent = None  
     if 'df' not in st.session_state:  
         st.session_state.df = None  
+    if 'df_sig' not in st.session_state:
+        st.session_state.df_sig = None
+    if 'upload_id' not in st.session_state:
+        st.session_state.upload_id = None
+    if 'df_head_arrow' not in st.session_state:
+        st.session_state.df_head_arrow = None
+    if 'describe_arrow' not in st.session_state:
+        st.session_state.describe_arrow = None
+    if 'col_groups' not in st.session_state:
+        st.session_state.col_groups = None
+    if 'memory_saved' not in st.session_state:
+        st.session_state.memory_saved = 0
     if 'analysis_history' not in st.session_state:  
-        st.session_state.analysis_history = []  
+        st.session_state.analysis_history = deque(maxlen=50)
     if 'gemini_connected' not in st.session_state:  
         st.session_state.gemini_connected = False
     if 'current_api_key' not in st.session_state:
         st.session_state.current_api_key = None
+    if 'question_input' not in st.session_state:
+        st.session_state.question_input = ""
   
-def create_eda_agent(df: pd.DataFrame, api_key: str) -> EDAAgent:  
+def _set_question(text: str):
+    """Form callback: replace the question box contents before the script reruns"""
+    st.session_state.question_input = text
+
+def _use_quick_analysis(questions: Dict[str, str]):
+    """Form callback: copy the chosen quick analysis into the question box"""
+    choice = st.session_state.quick_choice
+    if choice:
+        _set_question(questions[choice])
+  
+def create_eda_agent(df: pd.DataFrame, api_key: str) -> Optional["EDAAgent"]:
     """Create and initialize the EDA agent"""  
+    # Imported here: LangChain/Gemini/sklearn aren't needed until a dataset is being analyzed
+    from agents.eda_agent import EDAAgent
     try:  
         agent = EDAAgent(df, api_key)  
         st.session_state.gemini_connected = True
@@ -64,33 +97,211 @@ def create_eda_agent(df: pd.DataFrame, api_key: str) -> EDAAgent:
         st.session_state.gemini_connected = False
         return None  
   
+def _shrink_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Store columns in the narrowest dtype that keeps their values (in place)"""
+    # Integers stop at int32: int8/int16 would make arithmetic in generated code (qty * 10) wrap around silently
+    int32 = np.iinfo(np.int32)
+    for col in df.select_dtypes('int64').columns:
+        values = df[col].to_numpy()
+        if len(values) and int32.min <= values.min() and values.max() <= int32.max:
+            df[col] = values.astype(np.int32)
+    for col in df.select_dtypes('float').columns:
+        # to_numeric(downcast='float') would round values such as 0.1, so only take exact fits
+        values = df[col].to_numpy()
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow, values, equal_nan=True):
+            df[col] = narrow
+    for col in df.select_dtypes('object').columns:
+        if df[col].nunique(dropna=True) / max(len(df), 1) < 0.5:
+            df[col] = df[col].astype('category')
+    return df
+
+def _df_sig(raw: bytes) -> str:
+    """Content digest of an upload; every cached helper takes it as the key and skips hashing the frame"""
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+# pd.read_csv's default na_values, so Arrow reads the same cells as missing
+_PANDAS_NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
+
+def _arrow_read_csv(raw: bytes, column_types: Optional[Dict[str, Any]] = None) -> 'pa.Table':
+    """Arrow CSV parse with pandas' null handling"""
+    return pacsv.read_csv(
+        io.BytesIO(raw),
+        read_options=pacsv.ReadOptions(block_size=8 << 20, use_threads=True),
+        convert_options=pacsv.ConvertOptions(
+            null_values=_PANDAS_NA_VALUES,
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=True,
+            column_types=column_types
+        )
+    )
+
+@st.cache_data(show_spinner="Lendo CSV...", max_entries=4)
+def _read_csv(df_sig: str, _raw: bytes) -> Tuple[pd.DataFrame, int]:
+    """Parse an uploaded CSV with Arrow's multithreaded block reader, falling back to pandas.
+    
+    Returns the frame with shrunk dtypes and the number of bytes that saved.
+    """
+    try:
+        table = _arrow_read_csv(_raw)
+    except pa.ArrowInvalid:
+        table = None
+    # pandas renames duplicate and empty headers ('a.1', 'Unnamed: 1'); Arrow keeps them as is
+    names = table.schema.names if table is not None else []
+    if len(set(names)) != len(names) or not all(names):
+        table = None
+    if table is not None:
+        # pandas leaves date/time text unparsed; re-read those columns as strings to get the same dtypes
+        temporal = {field.name: pa.string() for field in table.schema if pa.types.is_temporal(field.type)}
+        if temporal:
+            table = _arrow_read_csv(_raw, column_types=temporal)
+        # Columns with no values at all come back as Arrow nulls; pandas reads them as all-NaN floats
+        for i, field in enumerate(table.schema):
+            if pa.types.is_null(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+    # Arrow keeps non-UTF-8 text as raw bytes; let pandas handle (or report) those files as before
+    if table is None or any(pa.types.is_binary(field.type) for field in table.schema):
+        df = pd.read_csv(io.BytesIO(_raw))
+    else:
+        df = table.to_pandas(self_destruct=True)
+    before = int(df.memory_usage(deep=True).sum())
+    df = _shrink_dtypes(df)
+    return df, before - int(df.memory_usage(deep=True).sum())
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _null_counts(df_sig: str, _df: pd.DataFrame) -> pd.Series:
+    """Per-column null counts, shared by the overview and the Informações tab"""
+    return _df.isna().sum()
+
+def _dup_estimate(df: pd.DataFrame) -> int:
+    """Duplicate row count; above 1M cells only the first three columns are compared (an upper bound)"""
+    if df.size < 1_000_000:
+        return int(df.duplicated().sum())
+    key = df.columns[:min(3, df.shape[1])]
+    return df.shape[0] - df[key].drop_duplicates().shape[0]
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _overview_stats(df_sig: str, _df: pd.DataFrame) -> Dict[str, Any]:
+    """Counts for the overview; keyed by the upload, so the scans run once per file"""
+    return {
+        'shape': _df.shape,
+        'nulls': int(_null_counts(df_sig, _df).sum()),
+        'dups': _dup_estimate(_df),
+        'dups_approx': _df.size >= 1_000_000
+    }
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _column_info(df_sig: str, _df: pd.DataFrame) -> Dict[str, Any]:
+    """Per-column type/null/unique tooltips for the Informações tab, built once per upload"""
+    nulls = _null_counts(df_sig, _df)
+    nunique = _df.nunique()
+    n = max(len(_df), 1)
+    return {
+        col: st.column_config.Column(
+            help=f"Tipo: {dtype} | Nulos: {nulls[col]:,} ({nulls[col] / n * 100:.2f}%) | Únicos: {nunique[col]:,}"
+        )
+        for col, dtype in _df.dtypes.items()
+    }
+
 def display_data_overview(df: pd.DataFrame):  
     """Display comprehensive data overview"""  
     st.subheader("📊 Visão Geral dos Dados")  
+    stats = _overview_stats(st.session_state.df_sig, df)
+    groups = st.session_state.col_groups
       
     col1, col2, col3, col4 = st.columns(4)  
       
     with col1:  
-        st.metric("Linhas", f"{df.shape[0]:,}")  
+        st.metric("Linhas", f"{stats['shape'][0]:,}")  
     with col2:  
-        st.metric("Colunas", df.shape[1])  
+        st.metric("Colunas", stats['shape'][1])  
     with col3:  
-        st.metric("Valores Nulos", f"{df.isnull().sum().sum():,}")  
+        st.metric("Valores Nulos", f"{stats['nulls']:,}")  
     with col4:  
-        st.metric("Duplicatas", f"{df.duplicated().sum():,}")  
-      
-    numeric_cols = df.select_dtypes(include=[np.number]).columns  
-    categorical_cols = df.select_dtypes(include=['object']).columns  
-    datetime_cols = df.select_dtypes(include=['datetime64']).columns  
+        st.metric("Duplicatas (aprox.)" if stats['dups_approx'] else "Duplicatas", f"{stats['dups']:,}")  
       
     col1, col2, col3 = st.columns(3)  
     with col1:  
-        st.metric("Colunas Numéricas", len(numeric_cols))  
+        st.metric("Colunas Numéricas", len(groups['num']))  
     with col2:  
-        st.metric("Colunas Categóricas", len(categorical_cols))  
+        st.metric("Colunas Categóricas", len(groups['cat']))  
     with col3:  
-        st.metric("Colunas Temporais", len(datetime_cols))  
+        st.metric("Colunas Temporais", len(groups['dt']))  
   
+def _plotly_chart(fig, key: str):
+    """Render a figure, downsampling large traces with plotly-resampler before they are serialized"""
+    n_points = sum(len(trace.x) for trace in fig.data if getattr(trace, 'x', None) is not None)
+    if any(trace.type == 'scatter' and trace.x is not None and len(trace.x) > 5000 for trace in fig.data):
+        fig = _to_webgl(fig)
+    if n_points >= 5000:
+        fig = _resample(fig)
+    st.plotly_chart(fig, use_container_width=True, key=key)
+
+def _resample(fig):
+    """Wrap the figure in a FigureResampler that only downsamples traces with ordered x"""
+    from plotly_resampler import FigureResampler
+    import plotly.graph_objects as go
+    resampled = FigureResampler(go.Figure(layout=fig.layout), default_n_shown_samples=2000)
+    for trace in fig.data:
+        x = getattr(trace, 'x', None)
+        # The aggregation requires monotonic x; unordered scatters (e.g. clusters) stay whole and rely on WebGL
+        if x is not None and not _is_monotonic(x):
+            resampled.add_trace(trace, max_n_samples=len(x))
+        else:
+            resampled.add_trace(trace)
+    return resampled
+
+def _is_monotonic(values) -> bool:
+    """Whether the values never decrease; mixed types that cannot be compared count as unordered"""
+    try:
+        return pd.Series(values).is_monotonic_increasing
+    except TypeError:
+        return False
+
+def _to_webgl(fig):
+    """Copy of the figure with large SVG scatter traces drawn as WebGL scattergl instead"""
+    import plotly.graph_objects as go
+    webgl_props = go.Scattergl()._valid_props
+    data = []
+    for trace in fig.data:
+        if trace.type == 'scatter' and trace.x is not None and len(trace.x) > 5000:
+            props = trace.to_plotly_json()
+            # WebGL cannot stack or pattern-fill; those traces stay SVG rather than render differently
+            if 'stackgroup' not in props and 'fillpattern' not in props:
+                try:
+                    trace = go.Scattergl({k: v for k, v in props.items() if k in webgl_props})
+                except ValueError:
+                    # Nested settings scattergl lacks, such as spline lines
+                    pass
+        data.append(trace)
+    return go.Figure(data=data, layout=fig.layout)
+
+def _combine_plots(plots: Dict[str, Any]):
+    """Lay the figures out two per row as subplots of a single figure, keeping titles and axis labels"""
+    from plotly.subplots import make_subplots
+    rows = math.ceil(len(plots) / 2)
+    combined = make_subplots(rows=rows, cols=2, subplot_titles=list(plots.keys()))
+    for i, fig in enumerate(plots.values()):
+        row, col = i // 2 + 1, i % 2 + 1
+        colorscale = fig.layout.coloraxis.colorscale
+        for trace in fig.data:
+            combined.add_trace(trace, row=row, col=col)
+            added = combined.data[-1]
+            # Plotly Express figures color through one layout-level coloraxis; give each trace its own scale
+            if getattr(added, 'coloraxis', None):
+                added.update(coloraxis=None, colorscale=colorscale, showscale=False)
+            elif getattr(getattr(added, 'marker', None), 'coloraxis', None):
+                added.marker.update(coloraxis=None, colorscale=colorscale)
+        if fig.layout.yaxis.autorange == 'reversed':
+            combined.update_yaxes(autorange='reversed', row=row, col=col)
+        combined.update_xaxes(title_text=fig.layout.xaxis.title.text, row=row, col=col)
+        combined.update_yaxes(title_text=fig.layout.yaxis.title.text, row=row, col=col)
+    combined.update_layout(height=400 * rows, showlegend=False)
+    return combined
+
 def display_analysis_result(result: Dict[str, Any]):  
     """Display analysis results with plots"""  
     if result['success']:  
@@ -114,14 +325,20 @@ def display_analysis_result(result: Dict[str, Any]):
             st.markdown("---")
             st.markdown("### 📊 Visualizações Geradas")
             
-            plots = result['plots']
+            from utils.advanced_analyzer import LazyFig
+            # Analyzer plots arrive unbuilt; build them only now that they are displayed
+            plots = {name: fig.figure if isinstance(fig, LazyFig) else fig for name, fig in result['plots'].items()}
             num_plots = len(plots)
+            # Stable keys let Streamlit reuse the mounted charts across reruns
+            key_prefix = hashlib.md5(
+                (result.get('analysis_type', '') + '|' + result.get('analysis', '')[:200]).encode()
+            ).hexdigest()[:8]
             
             if num_plots == 1:
                 # Single plot - full width
                 for plot_name, fig in plots.items():
                     st.markdown(f"#### {plot_name}")
-                    st.plotly_chart(fig, use_container_width=True, key=f"plot_{plot_name}_{datetime.now().timestamp()}")
+                    _plotly_chart(fig, key=f"plot_{key_prefix}_{plot_name}")
             
             elif num_plots == 2:
                 # Two plots side by side
@@ -129,25 +346,11 @@ def display_analysis_result(result: Dict[str, Any]):
                 for idx, (plot_name, fig) in enumerate(plots.items()):
                     with col1 if idx == 0 else col2:
                         st.markdown(f"#### {plot_name}")
-                        st.plotly_chart(fig, use_container_width=True, key=f"plot_{plot_name}_{datetime.now().timestamp()}")
+                        _plotly_chart(fig, key=f"plot_{key_prefix}_{plot_name}")
             
             else:
-                # Multiple plots - two per row
-                plot_items = list(plots.items())
-                for i in range(0, num_plots, 2):
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        if i < num_plots:
-                            plot_name, fig = plot_items[i]
-                            st.markdown(f"#### {plot_name}")
-                            st.plotly_chart(fig, use_container_width=True, key=f"plot_{plot_name}_{datetime.now().timestamp()}")
-                    
-                    with col2:
-                        if i + 1 < num_plots:
-                            plot_name, fig = plot_items[i + 1]
-                            st.markdown(f"#### {plot_name}")
-                            st.plotly_chart(fig, use_container_width=True, key=f"plot_{plot_name}_{datetime.now().timestamp()}")
+                # Multiple plots - two per row, as subplots of one figure so the browser runs a single newPlot
+                _plotly_chart(_combine_plots(plots), key=f"plot_{key_prefix}_combined")
             
             st.success(f"✅ {num_plots} gráfico(s) gerado(s) com sucesso!")
           
@@ -158,6 +361,81 @@ def display_analysis_result(result: Dict[str, Any]):
             with st.expander("Ver detalhes do erro"):
                 st.code(result['error_details'])
   
+@st.fragment
+def _analyze_panel():
+    """Question form, current result and recent history; a submit reruns only this panel"""
+    st.subheader("💬 Interface de Análise")  
+      
+    # Typing in the question doesn't rerun the script; only the buttons below submit it
+    with st.form("analyze_form"):
+        question = st.text_area(  
+            "Faça sua pergunta sobre os dados:",  
+            placeholder="Ex: Existe correlação entre as variáveis? Há outliers nos dados? Quais padrões você identifica? Quais suas conclusões?",  
+            height=100,  
+            key="question_input"  
+        )  
+          
+        col1, col2, col3 = st.columns([2, 1, 1])  
+          
+        with col1:  
+            analyze_btn = st.form_submit_button("🔍 Analisar", type="primary", use_container_width=True)  
+          
+        with col2:  
+            st.form_submit_button("🧹 Limpar Campo", use_container_width=True, on_click=_set_question, args=("",))
+          
+        with col3:  
+            history_btn = st.form_submit_button("📋 Ver Histórico", use_container_width=True)
+      
+    if history_btn and st.session_state.eda_agent:  
+        with st.expander("📚 Histórico de Análises", expanded=True):
+            summary = st.session_state.eda_agent.get_analysis_summary()  
+            st.markdown(summary)
+    
+    st.markdown("---")
+      
+    if analyze_btn and question:  
+        if not st.session_state.eda_agent:  
+            st.error("❌ Configure a API key do Gemini e conecte primeiro!")  
+        else:  
+            with st.spinner("🤖 Analisando dados... Isso pode levar alguns segundos."):  
+                try:
+                    result = st.session_state.eda_agent.analyze(question)  
+                      
+                    display_analysis_result(result)  
+                      
+                    # Keep only what the history list shows; the result and its figures stay out of session state
+                    st.session_state.analysis_history.append({  
+                        'ts_str': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
+                        'question': question,  
+                        'analysis_type': result.get('analysis_type'),
+                        'success': result['success'],
+                        'n_plots': len(result.get('plots') or {})
+                    })
+                    
+                except Exception as e:
+                    st.error(f"❌ Erro durante análise: {str(e)}")
+                    st.info("💡 Dica: Verifique se a API Key está correta e se há conexão com a internet")
+
+    _history_view()
+
+def _history_view():
+    """Recent analyses of this session"""
+    if st.session_state.analysis_history:  
+        st.markdown("---")  
+        st.subheader("📚 Últimas Análises Realizadas")  
+          
+        with st.expander("Ver últimas 5 análises", expanded=False):  
+            for i, entry in enumerate(islice(reversed(st.session_state.analysis_history), 5)):
+                st.markdown(f"**{i+1}. {entry['question'][:80]}{'...' if len(entry['question']) > 80 else ''}**")  
+                st.caption(f"⏰ {entry['ts_str']}")  
+                if entry['success']:  
+                    st.success(f"✅ Análise concluída - Tipo: {entry['analysis_type'] or 'N/A'}")
+                    if entry['n_plots']:
+                        st.info(f"📊 {entry['n_plots']} gráfico(s) gerado(s)")
+                else:  
+                    st.error("❌ Erro na análise")  
+                st.markdown("---")
+  
 def main():  
     st.markdown('<h1 class="main-header">🤖 Agente EDA Avançado</h1>', unsafe_allow_html=True)  
     st.markdown("*Análise Exploratória de Dados Inteligente com IA*")
@@ -204,9 +482,24 @@ def main():
           
         if uploaded_file is not None:  
             try:  
-                df = pd.read_csv(uploaded_file)  
-                st.session_state.df = df  
-                st.success("✅ Dados carregados!")  
+                # Reruns keep the same upload: reuse the parsed frame instead of reading it again
+                if uploaded_file.file_id != st.session_state.upload_id:
+                    raw = uploaded_file.getvalue()
+                    df_sig = _df_sig(raw)
+                    st.session_state.df, st.session_state.memory_saved = _read_csv(df_sig, raw)
+                    st.session_state.df_sig = df_sig
+                    st.session_state.upload_id = uploaded_file.file_id
+                    # Dtype partition read by the overview on every rerun instead of rescanning dtypes
+                    st.session_state.col_groups = {
+                        'num': st.session_state.df.select_dtypes(include=[np.number]).columns.tolist(),
+                        'cat': st.session_state.df.select_dtypes(include=['object', 'category']).columns.tolist(),
+                        'dt': st.session_state.df.select_dtypes(include=['datetime64', 'datetimetz']).columns.tolist()
+                    }
+                    # Sample/statistics tabs render these Arrow tables directly on every rerun
+                    st.session_state.df_head_arrow = pa.Table.from_pandas(st.session_state.df.head(20))
+                    st.session_state.describe_arrow = pa.Table.from_pandas(st.session_state.df.describe())
+                df = st.session_state.df
+                st.success(f"✅ Dados carregados! ({st.session_state.memory_saved / 2**20:.1f} MB economizados na memória)")
                 st.info(f"Dimensões: {df.shape[0]} × {df.shape[1]}")
                 
                 if api_key and not st.session_state.eda_agent:
@@ -233,17 +526,20 @@ def main():
                 ("💡 Conclusões Gerais", "Quais são suas conclusões consolidadas sobre todos os dados analisados?")  
             ]  
               
-            for label, question in quick_analyses:  
-                if st.button(label, key=f"quick_{label}", use_container_width=True):  
-                    st.session_state.current_question = question  
-                    st.rerun()
+            # One form so picking an option doesn't rerun the script until it is submitted
+            with st.form("quick_form"):
+                st.radio("Análise rápida", [label for label, _ in quick_analyses], index=None, key="quick_choice")
+                st.form_submit_button(
+                    "Executar", use_container_width=True,
+                    on_click=_use_quick_analysis, args=(dict(quick_analyses),)
+                )
             
             st.markdown("---")
             
             if st.button("🗑️ Limpar Memória", use_container_width=True, help="Limpa o histórico de análises"):
                 if st.session_state.eda_agent:
                     st.session_state.eda_agent.clear_memory()
-                    st.session_state.analysis_history = []
+                    st.session_state.analysis_history.clear()
                     st.success("Memória limpa!")
                     st.rerun()
       
@@ -252,91 +548,28 @@ def main():
           
         tab1, tab2, tab3 = st.tabs(["🔍 Amostra dos Dados", "📊 Estatísticas", "🔧 Informações"])  
           
+        # Inactive tabs are still rendered, so each table is only sent once the user opts in
         with tab1:  
-            st.dataframe(st.session_state.df.head(20), use_container_width=True)  
+            if st.toggle("Carregar amostra", value=True, key="tab1_load"):
+                st.dataframe(st.session_state.df_head_arrow, use_container_width=True)  
           
         with tab2:  
-            st.dataframe(st.session_state.df.describe(), use_container_width=True)  
+            if st.toggle("Carregar estatísticas", key="tab2_load"):
+                st.dataframe(st.session_state.describe_arrow, use_container_width=True)  
           
         with tab3:  
-            info_df = pd.DataFrame({  
-                'Coluna': st.session_state.df.columns,  
-                'Tipo': st.session_state.df.dtypes,  
-                'Nulos': st.session_state.df.isnull().sum(),  
-                '% Nulos': (st.session_state.df.isnull().sum() / len(st.session_state.df) * 100).round(2),
-                'Únicos': st.session_state.df.nunique()  
-            })  
-            st.dataframe(info_df, use_container_width=True)  
+            if st.toggle("Carregar informações", key="tab3_load"):
+                # Header-only view of the sample table; metadata rides along as column tooltips
+                st.caption("Passe o mouse sobre o nome de cada coluna para ver tipo, nulos e valores únicos.")
+                st.dataframe(
+                    st.session_state.df_head_arrow.slice(0, 0),
+                    column_config=_column_info(st.session_state.df_sig, st.session_state.df),
+                    use_container_width=True
+                )
           
         st.markdown("---")  
           
-        st.subheader("💬 Interface de Análise")  
-          
-        question = st.text_area(  
-            "Faça sua pergunta sobre os dados:",  
-            value=st.session_state.get('current_question', ''),  
-            placeholder="Ex: Existe correlação entre as variáveis? Há outliers nos dados? Quais padrões você identifica? Quais suas conclusões?",  
-            height=100,  
-            key="question_input"  
-        )  
-          
-        col1, col2, col3 = st.columns([2, 1, 1])  
-          
-        with col1:  
-            analyze_btn = st.button("🔍 Analisar", type="primary", use_container_width=True)  
-          
-        with col2:  
-            if st.button("🧹 Limpar Campo", use_container_width=True):  
-                st.session_state.current_question = ""  
-                st.rerun()  
-          
-        with col3:  
-            if st.button("📋 Ver Histórico", use_container_width=True):  
-                if st.session_state.eda_agent:  
-                    with st.expander("📚 Histórico de Análises", expanded=True):
-                        summary = st.session_state.eda_agent.get_analysis_summary()  
-                        st.markdown(summary)
-        
-        st.markdown("---")
-          
-        if analyze_btn and question:  
-            if not st.session_state.eda_agent:  
-                st.error("❌ Configure a API key do Gemini e conecte primeiro!")  
-            else:  
-                with st.spinner("🤖 Analisando dados... Isso pode levar alguns segundos."):  
-                    try:
-                        result = st.session_state.eda_agent.analyze(question)  
-                          
-                        display_analysis_result(result)  
-                          
-                        st.session_state.analysis_history.append({  
-                            'timestamp': datetime.now(),  
-                            'question': question,  
-                            'result': result  
-                        })
-                        
-                        # Clear the question field after successful analysis
-                        st.session_state.current_question = ""
-                        
-                    except Exception as e:
-                        st.error(f"❌ Erro durante análise: {str(e)}")
-                        st.info("💡 Dica: Verifique se a API Key está correta e se há conexão com a internet")
-
-        if st.session_state.analysis_history:  
-            st.markdown("---")  
-            st.subheader("📚 Últimas Análises Realizadas")  
-              
-            with st.expander("Ver últimas 5 análises", expanded=False):  
-                for i, entry in enumerate(reversed(st.session_state.analysis_history[-5:])):  
-                    st.markdown(f"**{i+1}. {entry['question'][:80]}{'...' if len(entry['question']) > 80 else ''}**")  
-                    st.caption(f"⏰ {entry['timestamp'].strftime('%d/%m/%Y %H:%M:%S')}")  
-                    if entry['result']['success']:  
-                        st.success(f"✅ Análise concluída - Tipo: {entry['result'].get('analysis_type', 'N/A')}")
-                        if entry['result'].get('plots'):
-                            st.info(f"📊 {len(entry['result']['plots'])} gráfico(s) gerado(s)")
-                    else:  
-                        st.error("❌ Erro na análise")  
-                    st.markdown("---")  
+        _analyze_panel()
       
     else:  
         st.markdown("## 🎯 Bem-vindo ao Agente EDA Avançado")  
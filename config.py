@@ -1,28 +1,35 @@
-import os  
+from functools import lru_cache
 from typing import Optional  
-from pydantic import BaseSettings, Field  
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
   
 class Settings(BaseSettings):  
     """Application settings"""  
       
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, extra="ignore")
+      
     # API Keys  
-    google_api_key: Optional[str] = Field(None, env="GOOGLE_API_KEY")  
+    google_api_key: Optional[str] = Field(None, validation_alias="GOOGLE_API_KEY")
       
     # Application settings  
-    max_file_size_mb: int = Field(100, env="MAX_FILE_SIZE_MB")  
-    max_memory_interactions: int = Field(100, env="MAX_MEMORY_INTERACTIONS")  
+    max_file_size_mb: int = Field(100, validation_alias="MAX_FILE_SIZE_MB")
+    # Analyses kept for summaries and conclusions; prompt context only ever injects the 3 most relevant
+    max_memory_interactions_summary: int = Field(100, validation_alias="MAX_MEMORY_INTERACTIONS_SUMMARY")
       
     # Analysis settings  
-    default_correlation_threshold: float = Field(0.5, env="DEFAULT_CORRELATION_THRESHOLD")  
-    max_clusters: int = Field(10, env="MAX_CLUSTERS")  
-    outlier_contamination: float = Field(0.1, env="OUTLIER_CONTAMINATION")  
+    default_correlation_threshold: float = Field(0.5, validation_alias="DEFAULT_CORRELATION_THRESHOLD")
+    max_clusters: int = Field(10, validation_alias="MAX_CLUSTERS")
+    outlier_contamination: float = Field(0.1, validation_alias="OUTLIER_CONTAMINATION")
+    # On-disk cache for heavy analyzer kernels across app restarts; empty disables it
+    analysis_cache_dir: Optional[str] = Field(".eda_cache", validation_alias="ANALYSIS_CACHE_DIR")
+    # Size cap for that directory; least recently used entries are evicted when an analyzer starts
+    analysis_cache_max_mb: int = Field(512, validation_alias="ANALYSIS_CACHE_MAX_MB")
       
     # Streamlit settings  
-    page_title: str = Field("Agente EDA Avançado", env="PAGE_TITLE")  
-    page_icon: str = Field("🤖", env="PAGE_ICON")  
-      
-    class Config:  
-        env_file = ".env"  
-        case_sensitive = False  
+    page_title: str = Field("Agente EDA Avançado", validation_alias="PAGE_TITLE")
+    page_icon: str = Field("🤖", validation_alias="PAGE_ICON")
   
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load settings (environment and .env) on first use and reuse them afterwards"""
+    return Settings()
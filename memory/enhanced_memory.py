@@ -1,104 +1,306 @@
-from typing import List, Dict, Any, Optional  
+import heapq
+import re
+import time
+import zlib
+from typing import List, Dict, Any, Optional, Set, FrozenSet, NamedTuple, Tuple  
 from datetime import datetime  
-from collections import deque  
-from pydantic import BaseModel, Field  
+from collections import Counter, deque  
+from itertools import islice
+import numpy as np
+
+# A finding is a bullet line or a line reporting something found/identified/detected/observed
+_FINDING_RE = re.compile(
+    r'(?im)^[^\S\n]*(?:[-•][^\n]*|[^\n]*?(?:encontrado|identificado|detectado|observado)[^\n]*)$'
+)
+
+# Fallback anchor for the recommendations section, and the dash bullets read from it
+_REC_ANCHOR_RE = re.compile(r'(?i)recomenda\w*|consider\w*')
+_BULLET_RE = re.compile(r'(?m)^[^\S\n]*-[^\n]*')
+
+# Question stems that tie a query to earlier analyses of a given type; one scan, the group name is the type
+_TYPE_RE = re.compile('|'.join(
+    f"(?P<{atype}>{'|'.join(stems)})" for atype, stems in {
+        'correlation': ['correla', 'relaç', 'relaciona'],
+        'outlier': ['outlier', 'anomalia', 'atípic'],
+        'distribution': ['distribui', 'histograma'],
+        'clustering': ['cluster', 'agrupamento', 'grupo'],
+        'temporal': ['tempo', 'temporal', 'time', 'trend'],
+        'conclusions': ['conclus', 'aprend', 'insights']
+    }.items()
+))
+_TOKEN_RE = re.compile(r'\w+')
+# Words that appear in most questions to this app and would tie unrelated analyses together
+_STOPWORDS = frozenset({
+    'quais', 'qual', 'entre', 'para', 'como', 'sobre', 'mostre', 'mostrar', 'existem', 'existe',
+    'dados', 'análise', 'analise', 'faça', 'fazer', 'pode', 'poderia', 'esses', 'essas', 'estes', 'estas',
+    'isso', 'este', 'esta', 'pelo', 'pela', 'seus', 'suas', 'mais', 'muito', 'também', 'quando', 'onde',
+    'what', 'which', 'show', 'with', 'from', 'about', 'there', 'data', 'analysis', 'analyze', 'please'
+})
+# Hashed character-trigram question embeddings; above this cosine a past question counts as a rewording
+_EMBED_DIM = 256
+_SIMILARITY_THRESHOLD = 0.6
+
+# Fixed text of the conclusions report
+_QUALITY_NOTES = {
+    'has_outliers': "- Outliers detectados: Podem indicar problemas de qualidade ou valores genuinamente extremos",
+    'many_outliers': "- Alta concentração de outliers: Requer investigação aprofundada",
+    'asymmetric_distributions': "- Distribuições assimétricas: Considere transformações para normalização"
+}
+_CORRELATIONS_NOTE = "- Correlações significativas foram identificadas entre variáveis"
+_STRONG_CORRELATIONS_NOTE = (
+    _CORRELATIONS_NOTE + "\n"
+    "- Algumas correlações são particularmente fortes\n"
+    "- **Recomendação**: Considere análise de multicolinearidade para modelagem"
+)
+_CLUSTERS_SECTION = (
+    "## 6. Segmentação e Agrupamentos\n"
+    "- Clusters distintos foram identificados nos dados\n"
+    "- **Oportunidade**: Use segmentação para análises direcionadas"
+)
+_TEMPORAL_SECTION = (
+    "## 7. Padrões Temporais\n"
+    "- Tendências temporais foram identificadas\n"
+    "- **Recomendação**: Considere análise de séries temporais"
+)
+_TYPE_DESCRIPTIONS = {
+    'correlation': 'Análise de correlações para entender relacionamentos',
+    'outlier': 'Detecção de outliers para identificar anomalias',
+    'distribution': 'Análise de distribuições para entender padrões',
+    'clustering': 'Clustering para identificar segmentos',
+    'temporal': 'Análise temporal para identificar tendências',
+    'summary': 'Resumo geral dos dados'
+}
+_GENERAL_ACTIONS = (
+    "### Ações Gerais:\n"
+    "- Validar descobertas com stakeholders\n"
+    "- Documentar insights para referência futura\n"
+    "- Considerar análises preditivas se apropriado"
+)
+
+# Pattern flag -> keywords that signal it in the (lowercased) analysis text
+_PATTERN_KEYWORDS = {
+    'has_correlations': ('correlação', 'correlation'),
+    'strong_correlations': ('forte', 'strong'),
+    'has_outliers': ('outlier', 'atípico'),
+    'many_outliers': ('alta porcentagem', 'high percentage', 'muitos outliers'),
+    'asymmetric_distributions': ('assimétrica', 'asymmetric', 'skew'),
+    'has_clusters': ('cluster', 'agrupamento'),
+    'has_temporal_patterns': ('tendência', 'trend', 'padrão temporal')
+}
+_PATTERN_FLAGS = list(_PATTERN_KEYWORDS)
+_PATTERN_IDX = {flag: i for i, flag in enumerate(_PATTERN_FLAGS)}
+# Qualifier flags are only checked once their base pattern was found
+_PATTERN_REQUIRES = {'strong_correlations': 'has_correlations', 'many_outliers': 'has_outliers'}
   
-class AnalysisMemory(BaseModel):  
-    """Enhanced memory for storing analysis insights and patterns"""  
-    timestamp: str  
+class AnalysisMemory(NamedTuple):  
+    """Enhanced memory for storing analysis insights and patterns; a plain tuple, built without validation"""  
+    timestamp_ns: int  
     question: str  
     analysis_type: str  
     key_findings: List[str]  
     visualizations: List[str]  
     data_patterns: Dict[str, Any]  
     recommendations: List[str]  
+    # Lowercased question words longer than three characters (stopwords removed), computed once at ingestion
+    question_tokens: FrozenSet[str] = frozenset()
+      
+    @property
+    def timestamp(self) -> str:
+        """ISO-formatted local time of the analysis, formatted on demand"""
+        seconds, nanos = divmod(self.timestamp_ns, 10**9)
+        return datetime.fromtimestamp(seconds).replace(microsecond=nanos // 1000).isoformat()
+  
+class _RingBuffer:
+    """Fixed-capacity history over a preallocated list; appending when full overwrites the oldest item"""
+    
+    def __init__(self, maxlen: int):
+        self.maxlen = maxlen
+        self._items: List[Any] = [None] * maxlen
+        self._head = 0  # slot of the oldest item
+        self._size = 0
+    
+    def append(self, item: Any) -> None:
+        """Add an item as the newest, evicting the oldest if the buffer is full"""
+        if not self.maxlen:
+            return
+        if self._size < self.maxlen:
+            self._items[(self._head + self._size) % self.maxlen] = item
+            self._size += 1
+        else:
+            self._items[self._head] = item
+            self._head = (self._head + 1) % self.maxlen
+    
+    def __getitem__(self, index: int) -> Any:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("ring buffer index out of range")
+        return self._items[(self._head + index) % self.maxlen]
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __iter__(self):
+        return (self._items[(self._head + i) % self.maxlen] for i in range(self._size))
+    
+    def __reversed__(self):
+        return (self._items[(self._head + i) % self.maxlen] for i in range(self._size - 1, -1, -1))
+    
+    def clear(self) -> None:
+        """Remove all items"""
+        self._items = [None] * self.maxlen
+        self._head = self._size = 0
   
 class EnhancedSessionMemory:  
     """Enhanced memory system for tracking analysis history and generating conclusions"""  
       
     def __init__(self, max_interactions: int = 100):  
         self.max_interactions = max_interactions  
-        self.analysis_history: deque = deque(maxlen=max_interactions)  
+        self.analysis_history: _RingBuffer = _RingBuffer(max_interactions)
         self.data_insights: Dict[str, Any] = {}  
         self.conversation_summary: str = ""
-        self.global_patterns: Dict[str, Any] = {}
+        # Pattern occurrences as struct-of-arrays indexed by _PATTERN_IDX, with per-type sources for each flag
+        self._pattern_counts = np.zeros(len(_PATTERN_IDX), dtype=np.int64)
+        self._pattern_sources: List[Counter] = [Counter() for _ in _PATTERN_IDX]
+        # Analysis types of the entries currently in analysis_history
+        self._type_counts: Counter = Counter()
+        # Recommendation occurrences across the entries in analysis_history
+        self._rec_counter: Counter = Counter()
+        # Inverted indexes over the entries in analysis_history, keyed by a running entry id
+        self._token_index: Dict[str, Set[int]] = {}
+        self._type_index: Dict[str, Set[int]] = {}
+        self._next_id = 0
+        # Question embeddings in a ring indexed by entry_id % max_interactions; -1 marks an empty row
+        self._embeddings = np.zeros((max_interactions, _EMBED_DIM), dtype=np.float32)
+        self._row_ids = np.full(max_interactions, -1, dtype=np.int64)
+        # Rendered reports, dropped whenever an analysis is added or memory is cleared
+        self._summary_cache: Optional[str] = None
+        self._conclusions_cache: Optional[str] = None
           
     def add_analysis(self, question: str, analysis_result: Dict[str, Any],   
                     analysis_type: str = "general") -> None:  
         """Add comprehensive analysis to memory"""  
-        memory_entry = AnalysisMemory(  
-            timestamp=datetime.now().isoformat(),  
+        self.bulk_add([(question, analysis_result, analysis_type)])
+      
+    def bulk_add(self, analyses: List[Tuple[str, Dict[str, Any], str]]) -> None:
+        """Add (question, analysis_result, analysis_type) triples in order, e.g. when restoring a past session"""
+        entries = [self._build_entry(*analysis) for analysis in analyses]
+        for memory_entry in entries:
+            self._update_insights(memory_entry)
+            self._update_global_patterns(memory_entry)
+          
+        # Older entries of a large batch would be evicted by the newer ones anyway; only index the survivors
+        kept = entries[max(len(entries) - self.max_interactions, 0):]
+        first_id = self._next_id
+        for memory_entry in kept:
+            if len(self.analysis_history) == self.max_interactions:
+                # The append below evicts the oldest entry
+                evicted = self.analysis_history[0]
+                self._discount(self._type_counts, [evicted.analysis_type])
+                self._discount(self._rec_counter, evicted.recommendations)
+                self._unindex(self._next_id - len(self.analysis_history), evicted)
+            self._type_counts[memory_entry.analysis_type] += 1
+            self._rec_counter.update(memory_entry.recommendations)
+            self._index(self._next_id, memory_entry)
+            self._next_id += 1
+            self.analysis_history.append(memory_entry)  
+        if kept:
+            rows = np.arange(first_id, self._next_id) % self.max_interactions
+            self._embeddings[rows] = self._embed_many([memory_entry.question for memory_entry in kept])
+        self._summary_cache = self._conclusions_cache = None
+      
+    def _build_entry(self, question: str, analysis_result: Dict[str, Any], analysis_type: str) -> AnalysisMemory:
+        """Extract findings, patterns and recommendations into a memory entry"""
+        # Lowercase once; the extractors share both forms of the text
+        text = analysis_result.get('analysis', '')
+        text_lower = text.lower()
+        return AnalysisMemory(  
+            timestamp_ns=time.time_ns(),
             question=question,  
+            question_tokens=self._tokenize(question),
             analysis_type=analysis_type,  
-            key_findings=self._extract_key_findings(analysis_result),  
+            key_findings=self._extract_key_findings(text),  
             visualizations=list(analysis_result.get('plots', {}).keys()),  
-            data_patterns=self._extract_patterns(analysis_result),  
-            recommendations=self._extract_recommendations(analysis_result)  
+            data_patterns=self._extract_patterns(text_lower),  
+            recommendations=self._extract_recommendations(text)  
         )  
-          
-        self.analysis_history.append(memory_entry)  
-        self._update_insights(memory_entry)
-        self._update_global_patterns(memory_entry)
       
-    def _extract_key_findings(self, analysis_result: Dict[str, Any]) -> List[str]:  
+    @staticmethod
+    def _discount(counter: Counter, keys: List[str]) -> None:
+        """Take one occurrence of each key off the counter, dropping keys that reach zero"""
+        for key in keys:
+            counter[key] -= 1
+            if not counter[key]:
+                del counter[key]
+      
+    @staticmethod
+    def _tokenize(text: str) -> FrozenSet[str]:
+        """Lowercased words longer than three characters, minus stopwords"""
+        return frozenset(word for word in _TOKEN_RE.findall(text.lower()) if len(word) > 3) - _STOPWORDS
+      
+    @staticmethod
+    def _embed_many(texts: List[str]) -> np.ndarray:
+        """Unit-norm bags of hashed character trigrams, one row per text; tolerant to plurals and inflections"""
+        padded = [f" {text.lower()} " for text in texts]
+        lengths = np.fromiter((max(len(p) - 2, 0) for p in padded), dtype=np.intp, count=len(padded))
+        buckets = np.fromiter(
+            (zlib.crc32(p[i:i + 3].encode()) % _EMBED_DIM for p in padded for i in range(len(p) - 2)),
+            dtype=np.intp, count=int(lengths.sum())
+        )
+        # One bincount over (row, bucket) pairs builds the whole count matrix
+        rows = np.repeat(np.arange(len(padded)), lengths)
+        vectors = np.bincount(rows * _EMBED_DIM + buckets, minlength=len(padded) * _EMBED_DIM)
+        vectors = vectors.reshape(len(padded), _EMBED_DIM).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+      
+    def _index(self, entry_id: int, entry: AnalysisMemory) -> None:
+        """Register an entry in the question-token and analysis-type indexes; its embedding is written by the caller"""
+        for token in entry.question_tokens:
+            self._token_index.setdefault(token, set()).add(entry_id)
+        self._type_index.setdefault(entry.analysis_type, set()).add(entry_id)
+        self._row_ids[entry_id % self.max_interactions] = entry_id
+      
+    def _unindex(self, entry_id: int, entry: AnalysisMemory) -> None:
+        """Drop an evicted entry from the indexes"""
+        for token in entry.question_tokens:
+            ids = self._token_index[token]
+            ids.discard(entry_id)
+            if not ids:
+                del self._token_index[token]
+        ids = self._type_index[entry.analysis_type]
+        ids.discard(entry_id)
+        if not ids:
+            del self._type_index[entry.analysis_type]
+      
+    def _extract_key_findings(self, analysis_text: str) -> List[str]:  
         """Extract key findings from analysis"""  
-        findings = []  
-        analysis_text = analysis_result.get('analysis', '')  
-          
-        lines = analysis_text.split('\n')  
-        for line in lines:  
-            stripped = line.strip()
-            if stripped.startswith('-') or stripped.startswith('•'):  
-                findings.append(stripped)
-            elif any(keyword in line.lower() for keyword in ['encontrado', 'identificado', 'detectado', 'observado']):
-                findings.append(stripped)
-          
-        return findings[:10]
+        # Stop scanning once the first 10 findings are matched
+        return [match.group(0).strip() for match in islice(_FINDING_RE.finditer(analysis_text), 10)]
       
-    def _extract_patterns(self, analysis_result: Dict[str, Any]) -> Dict[str, Any]:  
-        """Extract data patterns from analysis"""  
-        patterns = {}  
-        analysis_text = analysis_result.get('analysis', '').lower()
-          
-        # Correlation patterns
-        if 'correlação' in analysis_text or 'correlation' in analysis_text:  
-            patterns['has_correlations'] = True
-            if 'forte' in analysis_text or 'strong' in analysis_text:
-                patterns['strong_correlations'] = True
-          
-        # Outlier patterns  
-        if 'outlier' in analysis_text or 'atípico' in analysis_text:  
-            patterns['has_outliers'] = True
-            if any(word in analysis_text for word in ['alta porcentagem', 'high percentage', 'muitos outliers']):
-                patterns['many_outliers'] = True
-              
-        # Distribution patterns  
-        if 'assimétrica' in analysis_text or 'asymmetric' in analysis_text or 'skew' in analysis_text:  
-            patterns['asymmetric_distributions'] = True
-        
-        # Clustering patterns
-        if 'cluster' in analysis_text or 'agrupamento' in analysis_text:
-            patterns['has_clusters'] = True
-        
-        # Temporal patterns
-        if 'tendência' in analysis_text or 'trend' in analysis_text or 'padrão temporal' in analysis_text:
-            patterns['has_temporal_patterns'] = True
-              
+    def _extract_patterns(self, text_lower: str) -> Dict[str, Any]:  
+        """Extract data patterns from the lowercased analysis text"""  
+        patterns = {}
+        for flag, keywords in _PATTERN_KEYWORDS.items():
+            required = _PATTERN_REQUIRES.get(flag)
+            if required and required not in patterns:
+                continue
+            if any(keyword in text_lower for keyword in keywords):
+                patterns[flag] = True
         return patterns  
       
-    def _extract_recommendations(self, analysis_result: Dict[str, Any]) -> List[str]:  
+    def _extract_recommendations(self, analysis_text: str) -> List[str]:  
         """Extract recommendations from analysis"""  
-        recommendations = []  
-        analysis_text = analysis_result.get('analysis', '')  
-          
-        if 'recomenda' in analysis_text.lower() or 'consider' in analysis_text.lower():  
-            rec_section = analysis_text.split('Recomendações' if 'Recomendações' in analysis_text else 'ecomenda')[1] if 'ecomenda' in analysis_text else analysis_text
-            lines = rec_section.split('\n')  
-            for line in lines:  
-                if line.strip().startswith('-'):  
-                    recommendations.append(line.strip())
-          
-        return recommendations[:5]
+        # Bullets after the 'Recomendações' heading, else after the first recommend/consider word
+        heading = analysis_text.find('Recomendações')
+        if heading >= 0:
+            section = analysis_text[heading + len('Recomendações'):]
+        else:
+            match = _REC_ANCHOR_RE.search(analysis_text)
+            if match is None:
+                return []
+            section = analysis_text[match.end():]
+        return [match.group(0).strip() for match in islice(_BULLET_RE.finditer(section), 5)]
       
     def _update_insights(self, memory_entry: AnalysisMemory) -> None:  
         """Update global insights based on new analysis"""  
@@ -108,60 +310,70 @@ class EnhancedSessionMemory:
             self.data_insights[analysis_type] = {  
                 'count': 0,  
                 'patterns': {},  
-                'last_analysis': None,
-                'key_findings': []
+                'last_analysis_ns': None,
+                # Deduplicated, bounded to the 50 most recent findings
+                'key_findings': deque(maxlen=50),
+                '_seen': set()
             }  
           
         self.data_insights[analysis_type]['count'] += 1  
-        self.data_insights[analysis_type]['last_analysis'] = memory_entry.timestamp
-        self.data_insights[analysis_type]['key_findings'].extend(memory_entry.key_findings[:3])
+        self.data_insights[analysis_type]['last_analysis_ns'] = memory_entry.timestamp_ns
+        findings, seen = self.data_insights[analysis_type]['key_findings'], self.data_insights[analysis_type]['_seen']
+        for finding in memory_entry.key_findings[:3]:
+            if finding not in seen:
+                if len(findings) == findings.maxlen:
+                    seen.discard(findings[0])
+                seen.add(finding)
+                findings.append(finding)
           
         for pattern, value in memory_entry.data_patterns.items():  
             self.data_insights[analysis_type]['patterns'][pattern] = value
     
     def _update_global_patterns(self, memory_entry: AnalysisMemory) -> None:
         """Update global patterns across all analyses"""
-        for pattern, value in memory_entry.data_patterns.items():
-            if pattern not in self.global_patterns:
-                self.global_patterns[pattern] = {'count': 0, 'analyses': []}
-            self.global_patterns[pattern]['count'] += 1
-            self.global_patterns[pattern]['analyses'].append(memory_entry.analysis_type)
+        indices = [_PATTERN_IDX[pattern] for pattern in memory_entry.data_patterns]
+        self._pattern_counts[indices] += 1
+        for i in indices:
+            self._pattern_sources[i][memory_entry.analysis_type] += 1
+    
+    @property
+    def global_patterns(self) -> Dict[str, Any]:
+        """Patterns seen so far, in flag order: count and occurrences per analysis type (first-seen order)"""
+        return {
+            _PATTERN_FLAGS[i]: {'count': int(self._pattern_counts[i]), 'analyses': self._pattern_sources[i]}
+            for i in np.flatnonzero(self._pattern_counts)
+        }
       
     def get_contextual_memory(self, question: str, n: int = 3) -> List[AnalysisMemory]:  
         """Get relevant memory entries based on question context"""  
-        question_lower = question.lower()  
-        relevant_entries = []  
+        query_types = {match.lastgroup for match in _TYPE_RE.finditer(question.lower())}
+          
+        word_hits = set().union(*(self._token_index.get(token, ()) for token in self._tokenize(question)))
+        type_hits = set().union(*(self._type_index.get(atype, ()) for atype in query_types))
           
-        for entry in reversed(self.analysis_history):  
-            relevance_score = 0  
-              
-            # Question similarity  
-            if any(word in entry.question.lower() for word in question_lower.split() if len(word) > 3):  
-                relevance_score += 2  
-              
-            # Analysis type relevance  
-            type_keywords = {
-                'correlation': ['correlação', 'relação', 'correlation', 'relaciona'],
-                'outlier': ['outlier', 'anomalia', 'atípico'],
-                'distribution': ['distribuição', 'histograma', 'distribution'],
-                'clustering': ['cluster', 'agrupamento', 'grupo'],
-                'temporal': ['tempo', 'temporal', 'time', 'trend'],
-                'conclusions': ['conclus', 'aprend', 'insights']
-            }
-            
-            for atype, keywords in type_keywords.items():
-                if any(word in question_lower for word in keywords) and entry.analysis_type == atype:
-                    relevance_score += 3
-                    break
-              
-            if relevance_score > 0:  
-                relevant_entries.append((entry, relevance_score))  
+        # One matmul scores every stored question; word and type matches add their integer boosts on top
+        similarity = self._embeddings @ self._embed_many([question])[0]
+        boost = np.zeros(self.max_interactions, dtype=np.float32)
+        for hits, weight in ((word_hits, 2), (type_hits, 3)):
+            if hits:
+                boost[np.fromiter(hits, dtype=np.int64, count=len(hits)) % self.max_interactions] += weight
+        candidates = np.flatnonzero((self._row_ids >= 0) & ((boost > 0) | (similarity >= _SIMILARITY_THRESHOLD)))
           
-        relevant_entries.sort(key=lambda x: x[1], reverse=True)  
-        return [entry for entry, _ in relevant_entries[:n]]  
+        # Partial top-n selection; (score, entry_id) puts the most recent entry first among ties
+        scores = boost[candidates] + similarity[candidates]
+        top = heapq.nlargest(n, zip(scores.tolist(), self._row_ids[candidates].tolist()))
+        # History ids are consecutive and end at _next_id - 1, so each maps straight to a ring position
+        offset = self._next_id - len(self.analysis_history)
+        return [self.analysis_history[entry_id - offset] for _, entry_id in top]  
       
     def generate_summary(self) -> str:  
         """Generate a summary of all analyses performed"""  
+        if self._summary_cache is None:
+            self._summary_cache = self._build_summary()
+        return self._summary_cache
+      
+    def _build_summary(self) -> str:
+        """Render the summary from the current counters"""
         if not self.analysis_history:  
             return "Nenhuma análise realizada ainda."  
           
@@ -170,149 +382,87 @@ class EnhancedSessionMemory:
         summary_parts.append(f"Total de análises: {len(self.analysis_history)}\n")  
           
         # Analysis types summary  
-        type_counts = {}  
-        for entry in self.analysis_history:  
-            type_counts[entry.analysis_type] = type_counts.get(entry.analysis_type, 0) + 1  
-          
         summary_parts.append("\n### Tipos de Análises:")  
-        for analysis_type, count in type_counts.items():  
+        for analysis_type, count in self._type_counts.items():  
             summary_parts.append(f"- {analysis_type}: {count} análises")  
           
         # Key patterns found  
-        if self.global_patterns:  
+        patterns = self.global_patterns
+        if patterns:  
             summary_parts.append("\n### Padrões Identificados:")  
-            for pattern, data in self.global_patterns.items():  
+            for pattern, data in patterns.items():  
                 summary_parts.append(f"- {pattern}: detectado em {data['count']} análises")  
           
         return "\n".join(summary_parts)
     
     def generate_comprehensive_conclusions(self) -> str:
         """Generate comprehensive conclusions from all analyses performed"""
+        if self._conclusions_cache is None:
+            self._conclusions_cache = self._build_conclusions()
+        return self._conclusions_cache
+    
+    def _build_conclusions(self) -> str:
+        """Render the conclusions report from the current counters"""
         if not self.analysis_history:
             return "Nenhuma análise foi realizada ainda. Por favor, faça algumas análises primeiro."
         
-        conclusions = []
-        conclusions.append("# Conclusões Consolidadas da Análise Exploratória de Dados\n")
-        conclusions.append(f"*Baseado em {len(self.analysis_history)} análises realizadas*\n")
-        
-        # 1. Overview of analyses
-        conclusions.append("## 1. Resumo das Análises Realizadas")
-        type_counts = {}
-        for entry in self.analysis_history:
-            type_counts[entry.analysis_type] = type_counts.get(entry.analysis_type, 0) + 1
-        
-        for atype, count in type_counts.items():
-            conclusions.append(f"- **{atype}**: {count} análise(s)")
-        conclusions.append("")
-        
-        # 2. Key Patterns Discovered
-        conclusions.append("## 2. Principais Padrões Identificados")
-        if self.global_patterns:
-            for pattern, data in self.global_patterns.items():
-                pattern_name = pattern.replace('_', ' ').title()
-                conclusions.append(f"- **{pattern_name}**: Identificado em {data['count']} análise(s)")
-                conclusions.append(f"  - Detectado em: {', '.join(set(data['analyses']))}")
-        else:
-            conclusions.append("- Nenhum padrão global identificado ainda")
-        conclusions.append("")
-        
-        # 3. Key Findings by Analysis Type
-        conclusions.append("## 3. Principais Descobertas por Tipo de Análise")
-        for atype, insights in self.data_insights.items():
-            if insights['key_findings']:
-                conclusions.append(f"\n### {atype.title()}:")
-                unique_findings = list(set(insights['key_findings']))[:5]
-                for finding in unique_findings:
-                    conclusions.append(f"  {finding}")
-        conclusions.append("")
-        
-        # 4. Data Quality Insights
-        conclusions.append("## 4. Insights sobre Qualidade dos Dados")
-        quality_issues = []
-        if self.global_patterns.get('has_outliers'):
-            quality_issues.append("- Outliers detectados: Podem indicar problemas de qualidade ou valores genuinamente extremos")
-        if self.global_patterns.get('many_outliers'):
-            quality_issues.append("- Alta concentração de outliers: Requer investigação aprofundada")
-        if self.global_patterns.get('asymmetric_distributions'):
-            quality_issues.append("- Distribuições assimétricas: Considere transformações para normalização")
-        
-        if quality_issues:
-            conclusions.extend(quality_issues)
-        else:
-            conclusions.append("- Dados aparentam boa qualidade geral")
-        conclusions.append("")
-        
-        # 5. Relationships and Correlations
-        conclusions.append("## 5. Relacionamentos entre Variáveis")
-        if self.global_patterns.get('has_correlations'):
-            conclusions.append("- Correlações significativas foram identificadas entre variáveis")
-            if self.global_patterns.get('strong_correlations'):
-                conclusions.append("- Algumas correlações são particularmente fortes")
-                conclusions.append("- **Recomendação**: Considere análise de multicolinearidade para modelagem")
-        else:
-            conclusions.append("- Variáveis aparentam ser relativamente independentes")
-        conclusions.append("")
-        
-        # 6. Clustering and Segmentation
-        if self.global_patterns.get('has_clusters'):
-            conclusions.append("## 6. Segmentação e Agrupamentos")
-            conclusions.append("- Clusters distintos foram identificados nos dados")
-            conclusions.append("- **Oportunidade**: Use segmentação para análises direcionadas")
-            conclusions.append("")
-        
-        # 7. Temporal Patterns
-        if self.global_patterns.get('has_temporal_patterns'):
-            conclusions.append("## 7. Padrões Temporais")
-            conclusions.append("- Tendências temporais foram identificadas")
-            conclusions.append("- **Recomendação**: Considere análise de séries temporais")
-            conclusions.append("")
-        
-        # 8. Consolidated Recommendations
-        conclusions.append("## 8. Recomendações Consolidadas")
-        all_recommendations = []
-        for entry in self.analysis_history:
-            all_recommendations.extend(entry.recommendations)
-        
-        unique_recommendations = list(set(all_recommendations))[:8]
-        if unique_recommendations:
-            for rec in unique_recommendations:
-                conclusions.append(f"{rec}")
-        else:
-            conclusions.append("- Continue explorando os dados com análises mais específicas")
-        conclusions.append("")
-        
-        # 9. Next Steps
-        conclusions.append("## 9. Próximos Passos Sugeridos")
-        
-        # Suggest missing analyses
-        performed_types = set(type_counts.keys())
-        all_types = {'correlation', 'outlier', 'distribution', 'clustering', 'temporal', 'summary'}
-        missing_types = all_types - performed_types
-        
-        if missing_types:
-            conclusions.append("### Análises Recomendadas:")
-            type_descriptions = {
-                'correlation': 'Análise de correlações para entender relacionamentos',
-                'outlier': 'Detecção de outliers para identificar anomalias',
-                'distribution': 'Análise de distribuições para entender padrões',
-                'clustering': 'Clustering para identificar segmentos',
-                'temporal': 'Análise temporal para identificar tendências',
-                'summary': 'Resumo geral dos dados'
-            }
-            for mtype in missing_types:
-                if mtype in type_descriptions:
-                    conclusions.append(f"- {type_descriptions[mtype]}")
-        
-        conclusions.append("\n### Ações Gerais:")
-        conclusions.append("- Validar descobertas com stakeholders")
-        conclusions.append("- Documentar insights para referência futura")
-        conclusions.append("- Considerar análises preditivas se apropriado")
+        patterns = self.global_patterns
+        missing_types = [desc for atype, desc in _TYPE_DESCRIPTIONS.items() if atype not in self._type_counts]
+        recommendations = [rec for rec, _ in self._rec_counter.most_common(8)]
+        quality_issues = [note for flag, note in _QUALITY_NOTES.items() if patterns.get(flag)]
         
-        return "\n".join(conclusions)
+        # Sections are separated by one blank line; optional sections drop out as None
+        sections = [
+            "# Conclusões Consolidadas da Análise Exploratória de Dados\n\n"
+            f"*Baseado em {len(self.analysis_history)} análises realizadas*",
+            # 1. Overview of analyses
+            "## 1. Resumo das Análises Realizadas" + "".join(
+                f"\n- **{atype}**: {count} análise(s)" for atype, count in self._type_counts.items()
+            ),
+            # 2. Key Patterns Discovered
+            "## 2. Principais Padrões Identificados" + ("".join(
+                f"\n- **{pattern.replace('_', ' ').title()}**: Identificado em {data['count']} análise(s)"
+                f"\n  - Detectado em: {', '.join(data['analyses'])}"
+                for pattern, data in patterns.items()
+            ) if patterns else "\n- Nenhum padrão global identificado ainda"),
+            # 3. Key Findings by Analysis Type
+            "## 3. Principais Descobertas por Tipo de Análise" + "".join(
+                f"\n\n### {atype.title()}:" + "".join(f"\n  {finding}" for finding in islice(insights['key_findings'], 5))
+                for atype, insights in self.data_insights.items() if insights['key_findings']
+            ),
+            # 4. Data Quality Insights
+            "## 4. Insights sobre Qualidade dos Dados\n" + ("\n".join(quality_issues) or "- Dados aparentam boa qualidade geral"),
+            # 5. Relationships and Correlations
+            "## 5. Relacionamentos entre Variáveis\n" + (
+                (_STRONG_CORRELATIONS_NOTE if patterns.get('strong_correlations') else _CORRELATIONS_NOTE)
+                if patterns.get('has_correlations') else "- Variáveis aparentam ser relativamente independentes"
+            ),
+            # 6. Clustering and Segmentation
+            _CLUSTERS_SECTION if patterns.get('has_clusters') else None,
+            # 7. Temporal Patterns
+            _TEMPORAL_SECTION if patterns.get('has_temporal_patterns') else None,
+            # 8. Consolidated Recommendations
+            "## 8. Recomendações Consolidadas\n" + (
+                "\n".join(recommendations) or "- Continue explorando os dados com análises mais específicas"
+            ),
+            # 9. Next Steps, suggesting the analysis types not performed yet
+            "## 9. Próximos Passos Sugeridos" + (
+                "\n### Análises Recomendadas:" + "".join(f"\n- {desc}" for desc in missing_types) if missing_types else ""
+            ) + "\n\n" + _GENERAL_ACTIONS
+        ]
+        return "\n\n".join(section for section in sections if section is not None)
     
     def clear(self) -> None:
         """Clear all memory"""
         self.analysis_history.clear()
         self.data_insights.clear()
         self.conversation_summary = ""
-        self.global_patterns.clear()
\ No newline at end of file
+        self._pattern_counts.fill(0)
+        for sources in self._pattern_sources:
+            sources.clear()
+        self._type_counts.clear()
+        self._rec_counter.clear()
+        self._token_index.clear()
+        self._type_index.clear()
+        self._row_ids.fill(-1)
+        self._summary_cache = self._conclusions_cache = None
\ No newline at end of file
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+import app
+
+
+def _scatter(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return px.scatter(pd.DataFrame({'x': rng.normal(size=n), 'y': rng.normal(size=n)}), x='x', y='y')
+
+
+def test_resample_keeps_unsorted_scatter_whole():
+    fig = app._resample(_scatter(6000))
+    assert len(fig.data) == 1
+    assert len(fig.data[0].x) == 6000
+
+
+def test_resample_downsamples_sorted_trace():
+    x = np.arange(20000)
+    fig = app._resample(px.line(x=x, y=np.sin(x / 100)))
+    assert len(fig.hf_data) == 1
+    assert len(fig.data[0].x) <= 2000
+
+
+def test_combined_unsorted_scatters_render():
+    plots = {f'cluster_{i}': _scatter(6000, seed=i) for i in range(3)}
+    fig = app._to_webgl(app._combine_plots(plots))
+    fig = app._resample(fig)
+    assert [len(trace.x) for trace in fig.data] == [6000] * 3
+
+
+def test_to_webgl_drops_scatter_only_properties():
+    x = np.arange(6000)
+    fig = go.Figure(go.Scatter(x=x, y=np.cos(x / 50), cliponaxis=False, orientation='v'))
+    fig = app._to_webgl(fig)
+    assert fig.data[0].type == 'scattergl'
+
+
+def test_to_webgl_keeps_stacked_and_spline_traces():
+    x = np.arange(6000)
+    fig = go.Figure([
+        go.Scatter(x=x, y=np.cos(x / 50), stackgroup='one'),
+        go.Scatter(x=x, y=np.sin(x / 50), line_shape='spline'),
+    ])
+    fig = app._to_webgl(fig)
+    assert [trace.type for trace in fig.data] == ['scatter', 'scatter']
@@ -6,65 +6,176 @@ import plotly.express as px
 import plotly.graph_objects as go  
 from plotly.subplots import make_subplots  
 from scipy import stats  
-from sklearn.cluster import KMeans  
-from sklearn.preprocessing import StandardScaler  
+from sklearn.cluster import KMeans, MiniBatchKMeans  
+import joblib  
 import warnings  
-from typing import Dict, List, Any, Optional  
+from functools import lru_cache  
+from typing import Callable, Dict, List, Any, Optional, NamedTuple  
+import hashlib  
 import io  
 import sys  
+import threading
   
 warnings.filterwarnings('ignore')  
 
+# Above this many rows clustering switches to mini-batch KMeans, whose cost per iteration does not grow with N
+_MINIBATCH_ROWS = 100_000
+# Above this many points line traces are drawn with WebGL; SVG paths stall the browser on large series
+_WEBGL_POINTS = 5000
+
+# Lower bounds of the correlation strength bands and their labels, weakest first
+_STRENGTH_BINS = np.array([0.3, 0.5, 0.7, 0.9])
+_STRENGTH_LABELS = ("muito fraca", "fraca", "moderada", "forte", "muito forte")
+
+class ColumnMoments(NamedTuple):
+    """Count, mean and central moment sums of the non-null values of a numeric column"""
+    n: int
+    mean: float
+    m2: float
+    m3: float
+    m4: float
+    
+    @property
+    def std(self) -> float:
+        # Sample standard deviation (ddof=1), as Series.std
+        return float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else np.nan
+    
+    @property
+    def skew(self) -> float:
+        # Adjusted Fisher-Pearson coefficient, as Series.skew
+        if self.n < 3:
+            return np.nan
+        if self.m2 == 0:
+            return 0.0
+        n = self.n
+        return float(np.sqrt(n * (n - 1)) / (n - 2) * (self.m3 / n) / (self.m2 / n) ** 1.5)
+
+def schema_bytes(df: pd.DataFrame) -> bytes:
+    """Column names and dtypes, for content fingerprints; row hashes alone ignore headers and types"""
+    return repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode()
+
+# Heavy kernels are plain functions of (df_hash, df, args) so joblib.Memory can persist them on disk;
+# df itself is excluded from the joblib key, the content fingerprint stands in for it
+
+def _column_moments(df_hash: Optional[str], df: pd.DataFrame, column: str) -> ColumnMoments:
+    values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+    values = values[~np.isnan(values)]
+    n = values.size
+    mean = float(values.mean()) if n else np.nan
+    # The masked values are already a private copy, so deviations are taken in place; the
+    # higher sums are dot products, which reduce without allocating further N-sized temporaries
+    dev = values
+    dev -= mean
+    dev2 = dev * dev
+    return ColumnMoments(n, mean, float(dev2.sum()), float(np.dot(dev2, dev)), float(np.dot(dev2, dev2)))
+
+def _correlation_matrix(df_hash: Optional[str], df: pd.DataFrame, columns: List[str], method: str) -> pd.DataFrame:
+    return df[columns].corr(method=method)
+
+def _standardized_block(df_hash: Optional[str], df: pd.DataFrame, columns: List[str],
+                        means: np.ndarray, stds: np.ndarray) -> np.ndarray:
+    # float32 halves the bandwidth of KMeans' distance loop, which keeps the input dtype; standardized
+    # values lose nothing that matters for cluster assignment
+    X = df[columns].to_numpy(dtype=np.float32, na_value=np.nan, copy=True)
+    means = means.astype(np.float32)
+    rows, cols = np.nonzero(np.isnan(X))
+    X[rows, cols] = means[cols]
+    X -= means
+    X /= stds.astype(np.float32)
+    return X
+
+class LazyFig:
+    """Plot placeholder that builds its figure on first access to .figure"""
+    
+    def __init__(self, build: Callable[[], Any]):
+        self._build = build
+        self._figure = None
+    
+    @property
+    def figure(self) -> Any:
+        if self._figure is None:
+            self._figure = self._build()
+            self._build = None  # Release whatever the builder closed over
+        return self._figure
+
+@lru_cache(maxsize=128)
+def _compile_code(code: str):
+    """Compiled code object for a source string; retried and repeated snippets skip the parser"""
+    return compile(code, '<string>', 'exec')
+
 class PythonCodeExecutor:  
     """Execute Python code for data analysis"""
     
+    # sys.stdout is process-global, so concurrent executions must not interleave
+    _stdout_lock = threading.Lock()
+    
+    # Modules every snippet can use; they take precedence over same-named caller globals
+    _BASE_GLOBALS = {  
+        'pd': pd,  
+        'np': np,  
+        'plt': plt,  
+        'sns': sns,  
+        'px': px,  
+        'go': go,  
+        'stats': stats
+    }  
+    
     def __init__(self):
         pass
       
     def execute(self, code: str, globals_dict: Dict[str, Any] = None) -> Dict[str, Any]:  
         """Execute Python code with DataFrame context"""  
-        if globals_dict is None:  
-            globals_dict = {}  
-          
-        globals_dict.update({  
-            'pd': pd,  
-            'np': np,  
-            'plt': plt,  
-            'sns': sns,  
-            'px': px,  
-            'go': go,  
-            'stats': stats
-        })  
-          
-        old_stdout = sys.stdout  
-        sys.stdout = captured_output = io.StringIO()  
+        # exec needs a real dict; merge into a fresh one sized in a single step
+        globals_dict = {**globals_dict, **self._BASE_GLOBALS} if globals_dict else dict(self._BASE_GLOBALS)  
           
-        try:  
-            exec(code, globals_dict)  
-            output = captured_output.getvalue()  
-            return {  
-                'success': True,  
-                'output': output,  
-                'globals': globals_dict  
-            }  
-        except Exception as e:  
-            return {  
-                'success': False,  
-                'error': str(e),  
-                'output': captured_output.getvalue()  
-            }  
-        finally:  
-            sys.stdout = old_stdout  
+        with self._stdout_lock:
+            old_stdout = sys.stdout  
+            sys.stdout = captured_output = io.StringIO()  
+              
+            try:  
+                exec(_compile_code(code), globals_dict)  
+                output = captured_output.getvalue()  
+                return {  
+                    'success': True,  
+                    'output': output,  
+                    'globals': globals_dict  
+                }  
+            except Exception as e:  
+                return {  
+                    'success': False,  
+                    'error': str(e),  
+                    'output': captured_output.getvalue()  
+                }  
+            finally:  
+                sys.stdout = old_stdout  
   
 class AdvancedDataAnalyzer:  
     """Enhanced data analyzer with dynamic code generation and advanced analytics"""  
       
-    def __init__(self, df: pd.DataFrame):  
+    def __init__(self, df: pd.DataFrame, cache_dir: Optional[str] = None, df_hash: Optional[str] = None,
+                 cache_bytes_limit: Optional[int] = None):  
         self.df = df  
         self.numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()  
-        self.categorical_columns = df.select_dtypes(include=['object']).columns.tolist()  
+        self.categorical_columns = df.select_dtypes(include=['object', 'category']).columns.tolist()  
         self.datetime_columns = df.select_dtypes(include=['datetime64']).columns.tolist()  
         self.analysis_cache = {}
+        
+        # With a cache_dir, the heavy kernels also persist across processes, keyed by a content fingerprint
+        # of df; a caller-supplied df_hash must cover column names and dtypes as well as values
+        if cache_dir and df_hash is None:
+            fingerprint = hashlib.blake2b(
+                pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes(), digest_size=16
+            )
+            fingerprint.update(schema_bytes(df))
+            df_hash = fingerprint.hexdigest()
+        self._df_hash = df_hash
+        disk_cache = joblib.Memory(cache_dir or None, verbose=0)
+        if cache_dir and cache_bytes_limit is not None:
+            # Evict least recently used entries so the directory stays bounded across uploads
+            disk_cache.reduce_size(bytes_limit=cache_bytes_limit)
+        self._column_moments = disk_cache.cache(_column_moments, ignore=['df'])
+        self._correlation_matrix = disk_cache.cache(_correlation_matrix, ignore=['df'])
+        self._standardized_block = disk_cache.cache(_standardized_block, ignore=['df'])
     
     def distribution_analysis_tool(self, column: str = None) -> Dict[str, Any]:
         """Analyze distribution of variables with histograms and statistics"""
@@ -87,34 +198,18 @@ class AdvancedDataAnalyzer:
         
         analysis_text = "## Análise de Distribuições\n\n"
         insights = []
+        skews = {}
         
         for col in columns_to_analyze:
-            # Create histogram with distribution curve
-            fig = go.Figure()
-            
-            # Histogram
-            fig.add_trace(go.Histogram(
-                x=self.df[col],
-                name='Distribuição',
-                nbinsx=50,
-                opacity=0.7
-            ))
-            
-            fig.update_layout(
-                title=f'Distribuição: {col}',
-                xaxis_title=col,
-                yaxis_title='Frequência',
-                showlegend=True,
-                height=400
-            )
-            
-            plots[f'Distribution_{col}'] = fig
+            plots[f'Distribution_{col}'] = LazyFig(lambda col=col: self._distribution_figure(col))
             
             # Calculate statistics
-            mean_val = self.df[col].mean()
+            moments = self._moments(col)
+            mean_val = moments.mean
             median_val = self.df[col].median()
-            std_val = self.df[col].std()
-            skew_val = self.df[col].skew()
+            std_val = moments.std
+            skew_val = moments.skew
+            skews[col] = skew_val
             
             analysis_text += f"### {col}:\n"
             analysis_text += f"- Média: {mean_val:.2f}\n"
@@ -135,7 +230,7 @@ class AdvancedDataAnalyzer:
             analysis_text += "\n"
         
         recommendations = []
-        if any(abs(self.df[col].skew()) > 1 for col in columns_to_analyze):
+        if any(abs(skew_val) > 1 for skew_val in skews.values()):
             recommendations.append("Considere transformações (log, sqrt) para variáveis muito assimétricas")
         
         return {
@@ -155,28 +250,25 @@ class AdvancedDataAnalyzer:
                 'recommendations': []  
             }  
           
-        corr_matrix = self.df[self.numeric_columns].corr(method=method)  
+        corr_matrix = self._corr_matrix(method)  
           
-        fig = px.imshow(  
-            corr_matrix,  
-            title=f'Matriz de Correlação ({method.title()})',  
-            color_continuous_scale='RdBu_r',  
-            aspect='auto',
-            labels=dict(color="Correlação")
-        )  
-        fig.update_layout(width=900, height=700)  
-          
-        significant_corrs = []  
-        for i in range(len(corr_matrix.columns)):  
-            for j in range(i+1, len(corr_matrix.columns)):  
-                corr_value = corr_matrix.iloc[i, j]  
-                if abs(corr_value) >= threshold:  
-                    significant_corrs.append({  
-                        'var1': corr_matrix.columns[i],  
-                        'var2': corr_matrix.columns[j],  
-                        'correlation': corr_value,  
-                        'strength': self._correlation_strength(abs(corr_value))  
-                    })  
+        # Upper-triangle pairs in row-major order, filtered by threshold in one vectorized pass
+        values = corr_matrix.to_numpy()
+        rows, cols = np.triu_indices(values.shape[0], k=1)
+        pair_values = values[rows, cols]
+        selected = np.flatnonzero(np.abs(pair_values) >= threshold)
+        columns = corr_matrix.columns
+        # Strength bands for all selected pairs in one searchsorted call
+        bands = np.searchsorted(_STRENGTH_BINS, np.abs(pair_values[selected]), side='right')
+        significant_corrs = [  
+            {  
+                'var1': columns[rows[k]],  
+                'var2': columns[cols[k]],  
+                'correlation': pair_values[k],  
+                'strength': _STRENGTH_LABELS[band]  
+            }  
+            for k, band in zip(selected, bands)  
+        ]  
           
         insights = []  
         if significant_corrs:  
@@ -200,7 +292,7 @@ class AdvancedDataAnalyzer:
           
         return {  
             'analysis': analysis_text,  
-            'plots': {'Correlation_Matrix': fig},  
+            'plots': {'Correlation_Matrix': LazyFig(lambda: self._correlation_figure(corr_matrix, method))},  
             'insights': insights,  
             'recommendations': recommendations  
         }  
@@ -217,25 +309,19 @@ class AdvancedDataAnalyzer:
           
         outlier_results = {}  
         plots = {}  
+        columns = self.numeric_columns[:6]  
+        # IQR (also the fallback method) takes the quartiles of all columns in one batched call
+        iqr_results = self._iqr_outliers(columns) if method != "zscore" else {}  
           
-        for col in self.numeric_columns[:6]:  
-            if method == "iqr":  
-                outliers = self._detect_outliers_iqr(col)  
-            elif method == "zscore":  
+        for col in columns:  
+            if method == "zscore":  
                 outliers = self._detect_outliers_zscore(col)  
             else:  
-                outliers = self._detect_outliers_iqr(col)  
+                outliers = iqr_results[col]  
               
             outlier_results[col] = outliers  
               
-            fig = px.box(  
-                self.df,   
-                y=col,   
-                title=f'Detecção de Outliers: {col}',  
-                points="outliers"  
-            )
-            fig.update_layout(height=400)
-            plots[f'Outliers_{col}'] = fig  
+            plots[f'Outliers_{col}'] = LazyFig(lambda col=col: self._outlier_figure(col))  
           
         analysis_text = self._format_outlier_analysis(outlier_results, method)  
           
@@ -271,12 +357,14 @@ class AdvancedDataAnalyzer:
                 'recommendations': []
             }
         
-        X = self.df[self.numeric_columns].fillna(self.df[self.numeric_columns].mean())
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
+        X_scaled = self._scaled_numeric()
         
         if method == "kmeans":
-            clusterer = KMeans(n_clusters=n_clusters, random_state=42)
+            # KMeans already spreads each init over all cores with OpenMP threads
+            if len(X_scaled) > _MINIBATCH_ROWS:
+                clusterer = MiniBatchKMeans(n_clusters=n_clusters, batch_size=4096, n_init=3, random_state=42)
+            else:
+                clusterer = KMeans(n_clusters=n_clusters, n_init=10, random_state=42)
             clusters = clusterer.fit_predict(X_scaled)
         else:
             return {
@@ -286,28 +374,22 @@ class AdvancedDataAnalyzer:
                 'recommendations': []
             }
         
-        cluster_df = self.df.copy()
-        cluster_df['Cluster'] = clusters
-        cluster_stats = cluster_df.groupby('Cluster')[self.numeric_columns].mean()
+        # Group by the label array directly instead of appending it to a copy of the frame; sorting the
+        # k result rows afterwards is cheaper than a sorted groupby and keeps the report in label order
+        cluster_stats = self.df[self.numeric_columns].groupby(clusters, sort=False).mean().sort_index()
         
         plots = {}
         if len(self.numeric_columns) >= 2:
-            fig = px.scatter(
-                cluster_df,
-                x=self.numeric_columns[0],
-                y=self.numeric_columns[1],
-                color='Cluster',
-                title=f'Análise de Clustering ({method}, k={n_clusters})',
-                labels={'color': 'Cluster'}
-            )
-            fig.update_layout(height=500)
-            plots['Clustering_Scatter'] = fig
+            plots['Clustering_Scatter'] = LazyFig(lambda: self._clustering_figure(clusters, method, n_clusters))
         
         analysis_text = self._format_clustering_analysis(cluster_stats, method, n_clusters)
         
+        # Labels are small ints in [0, n_clusters), so a bincount gives every cluster size in one pass
+        sizes = np.bincount(clusters, minlength=n_clusters)
+        largest = int(sizes.argmax())
         insights = [
             f"Identificados {n_clusters} clusters distintos",
-            f"Maior cluster: {pd.Series(clusters).value_counts().idxmax()} com {pd.Series(clusters).value_counts().max()} amostras"
+            f"Maior cluster: {largest} com {int(sizes[largest])} amostras"
         ]
         
         recommendations = [
@@ -343,21 +425,12 @@ class AdvancedDataAnalyzer:
                 'recommendations': []  
             }  
           
-        time_data = pd.to_datetime(self.df[time_column], errors='coerce')  
-        if time_data.isna().all():  
-            time_data = pd.to_datetime(self.df[time_column], unit='s', errors='coerce')  
+        time_data = self._parsed_datetime(time_column)  
           
         plots = {}  
           
         for col in self.numeric_columns[:3]:  
-            fig = px.line(  
-                x=time_data,  
-                y=self.df[col],  
-                title=f'Padrão Temporal: {col}',  
-                labels={'x': 'Tempo', 'y': col}  
-            )
-            fig.update_layout(height=400)
-            plots[f'Temporal_{col}'] = fig  
+            plots[f'Temporal_{col}'] = LazyFig(lambda col=col: self._temporal_figure(time_data, col))  
           
         analysis_text = self._format_temporal_analysis(time_column, time_data)  
           
@@ -378,31 +451,127 @@ class AdvancedDataAnalyzer:
             'recommendations': recommendations  
         }  
       
-    def _correlation_strength(self, corr_value: float) -> str:  
-        if corr_value >= 0.9:  
-            return "muito forte"  
-        elif corr_value >= 0.7:  
-            return "forte"  
-        elif corr_value >= 0.5:  
-            return "moderada"  
-        elif corr_value >= 0.3:  
-            return "fraca"  
-        else:  
-            return "muito fraca"  
+    def _distribution_figure(self, col: str) -> go.Figure:
+        fig = go.Figure()
+        
+        # Histogram
+        fig.add_trace(go.Histogram(
+            x=self.df[col],
+            name='Distribuição',
+            nbinsx=50,
+            opacity=0.7
+        ))
+        
+        fig.update_layout(
+            title=f'Distribuição: {col}',
+            xaxis_title=col,
+            yaxis_title='Frequência',
+            showlegend=True,
+            height=400
+        )
+        return fig
+      
+    def _correlation_figure(self, corr_matrix: pd.DataFrame, method: str) -> go.Figure:
+        fig = px.imshow(  
+            corr_matrix,  
+            title=f'Matriz de Correlação ({method.title()})',  
+            color_continuous_scale='RdBu_r',  
+            aspect='auto',
+            labels=dict(color="Correlação")
+        )  
+        fig.update_layout(width=900, height=700)  
+        return fig
+      
+    def _outlier_figure(self, col: str) -> go.Figure:
+        fig = go.Figure(go.Box(y=self.df[col], name=col, boxpoints='outliers'))
+        fig.update_layout(
+            title=f'Detecção de Outliers: {col}',
+            yaxis_title=col,
+            height=400
+        )
+        return fig
+      
+    def _clustering_figure(self, clusters: np.ndarray, method: str, n_clusters: int) -> go.Figure:
+        fig = px.scatter(
+            self.df,
+            x=self.numeric_columns[0],
+            y=self.numeric_columns[1],
+            color=clusters,
+            title=f'Análise de Clustering ({method}, k={n_clusters})',
+            labels={'color': 'Cluster'}
+        )
+        fig.update_layout(height=500)
+        return fig
+      
+    def _temporal_figure(self, time_data: pd.Series, col: str) -> go.Figure:
+        trace_type = go.Scattergl if len(time_data) > _WEBGL_POINTS else go.Scatter
+        fig = go.Figure(trace_type(x=time_data, y=self.df[col], mode='lines'))
+        fig.update_layout(
+            title=f'Padrão Temporal: {col}',
+            xaxis_title='Tempo',
+            yaxis_title=col,
+            height=400
+        )
+        return fig
       
     def _detect_outliers_iqr(self, column: str) -> List[int]:  
-        Q1 = self.df[column].quantile(0.25)  
-        Q3 = self.df[column].quantile(0.75)  
+        return self._iqr_outliers([column])[column]  
+      
+    def _iqr_outliers(self, columns: List[str]) -> Dict[str, List[int]]:  
+        values = self.df[columns].to_numpy(dtype=np.float64, na_value=np.nan)  
+        # Nulls are skipped as in Series.quantile, and never flagged
+        Q1, Q3 = np.nanquantile(values, [0.25, 0.75], axis=0)  
         IQR = Q3 - Q1  
-        lower_bound = Q1 - 1.5 * IQR  
-        upper_bound = Q3 + 1.5 * IQR  
-        outlier_mask = (self.df[column] < lower_bound) | (self.df[column] > upper_bound)  
-        return self.df[outlier_mask].index.tolist()  
+        outlier_mask = (values < Q1 - 1.5 * IQR) | (values > Q3 + 1.5 * IQR)  
+        return {col: self.df.index[outlier_mask[:, i]].tolist() for i, col in enumerate(columns)}  
       
     def _detect_outliers_zscore(self, column: str, threshold: float = 3) -> List[int]:  
-        z_scores = np.abs(stats.zscore(self.df[column].fillna(self.df[column].mean())))  
-        outlier_mask = z_scores > threshold  
-        return self.df[outlier_mask].index.tolist()  
+        moments = self._moments(column)
+        # Mean-filled nulls add no deviation, so the population std of the filled column is sqrt(m2 / len)
+        std = np.sqrt(moments.m2 / len(self.df)) if len(self.df) > 0 else np.nan
+        # One private copy, then deviations and magnitudes in place (nulls stay NaN and never compare true)
+        deviations = self.df[column].to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+        deviations -= moments.mean
+        np.abs(deviations, out=deviations)
+        outlier_mask = deviations > threshold * std
+        return self.df.index[outlier_mask].tolist()  
+      
+    def _corr_matrix(self, method: str) -> pd.DataFrame:
+        """Correlation matrix of the numeric columns, computed once per method"""
+        key = ('corr', method)
+        if key not in self.analysis_cache:
+            self.analysis_cache[key] = self._correlation_matrix(self._df_hash, self.df, self.numeric_columns, method)
+        return self.analysis_cache[key]
+      
+    def _parsed_datetime(self, column: str) -> pd.Series:
+        """Column parsed as datetimes (falling back to epoch seconds), computed once per column"""
+        key = ('dt', column)
+        if key not in self.analysis_cache:
+            parsed = pd.to_datetime(self.df[column], errors='coerce', cache=True)
+            if parsed.isna().all():
+                parsed = pd.to_datetime(self.df[column], unit='s', errors='coerce')
+            self.analysis_cache[key] = parsed
+        return self.analysis_cache[key]
+      
+    def _scaled_numeric(self) -> np.ndarray:
+        """Mean-filled, standardized float32 numeric block, computed once per analyzer"""
+        if 'X_scaled' not in self.analysis_cache:
+            moments = [self._moments(col) for col in self.numeric_columns]
+            means = np.array([m.mean for m in moments])
+            # Filled nulls sit on the mean, so the population std is sqrt(m2 / len); constant columns keep scale 1
+            stds = np.sqrt(np.array([m.m2 for m in moments]) / len(self.df))
+            stds[stds == 0] = 1.0
+            self.analysis_cache['X_scaled'] = self._standardized_block(
+                self._df_hash, self.df, self.numeric_columns, means, stds
+            )
+        return self.analysis_cache['X_scaled']
+      
+    def _moments(self, column: str) -> ColumnMoments:
+        """Moments of a numeric column, computed once per analyzer"""
+        key = ('moments', column)
+        if key not in self.analysis_cache:
+            self.analysis_cache[key] = self._column_moments(self._df_hash, self.df, column)
+        return self.analysis_cache[key]
       
     def _format_correlation_analysis(self, correlations: List[Dict], method: str) -> str:  
         analysis = f"## Análise de Correlações ({method.title()})\n\n"  
@@ -6,9 +6,12 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle  
 from reportlab.lib.units import inch  
 from datetime import datetime  
+import concurrent.futures  
 import io  
+import os  
 import base64  
 from typing import Dict, List, Any  
+from utils.advanced_analyzer import LazyFig  
   
 class ReportExporter:  
     """Export analysis results to various formats"""  
@@ -43,6 +46,10 @@ class ReportExporter:
         doc = SimpleDocTemplate(filename, pagesize=A4)  
         story = []  
           
+        # Render every plot up front, in parallel, then place the images in order while walking the results
+        figures = [fig for result in analysis_results for fig in (result.get('plots') or {}).values()]  
+        images = iter(self._render_images(figures))  
+          
         # Title  
         title = Paragraph("Relatório de Análise Exploratória de Dados",   
                          self.custom_styles['CustomTitle'])  
@@ -71,28 +78,43 @@ class ReportExporter:
               
             # Add plots if available  
             if result.get('plots'):  
-                for plot_name, fig in result['plots'].items():  
-                    # Convert plot to image  
-                    img_buffer = io.BytesIO()  
-                    fig.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')  
-                    img_buffer.seek(0)  
-                      
+                for plot_name in result['plots']:  
                     # Add to PDF  
-                    img = Image(img_buffer, width=6*inch, height=4*inch)  
+                    img = Image(io.BytesIO(next(images)), width=6*inch, height=4*inch)  
                     story.append(img)  
                     story.append(Spacer(1, 12))  
           
         doc.build(story)  
         return filename  
       
+    def _render_images(self, figures: List[Any]) -> List[bytes]:  
+        """PNG bytes of each figure, rendered concurrently"""  
+        if not figures:  
+            return []  
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(figures), os.cpu_count() or 1)) as pool:  
+            return list(pool.map(self._render_png, figures))  
+      
+    @staticmethod  
+    def _render_png(fig: Any) -> bytes:  
+        """PNG bytes of a Plotly or Matplotlib figure, sized for a 6x4 inch slot at 150 dpi"""  
+        if isinstance(fig, LazyFig):  
+            fig = fig.figure  
+        if isinstance(fig, go.Figure):  
+            return fig.to_image(format='png', width=900, height=600)  
+        img_buffer = io.BytesIO()  
+        fig.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')  
+        return img_buffer.getvalue()  
+      
     def export_data_summary(self, df: pd.DataFrame) -> Dict[str, Any]:  
         """Export comprehensive data summary"""  
+        # A deep count walks every Python object in object columns; large or text-wide frames get the shallow figure
+        deep_memory = len(df) <= 1_000_000 and (df.dtypes == object).sum() <= 50  
         summary = {  
             'basic_info': {  
                 'shape': df.shape,  
                 'columns': df.columns.tolist(),  
                 'dtypes': df.dtypes.to_dict(),  
-                'memory_usage': df.memory_usage(deep=True).sum(),  
+                'memory_usage': df.memory_usage(deep=deep_memory).sum(),  
                 'missing_values': df.isnull().sum().to_dict(),  
                 'duplicates': df.duplicated().sum()  
             },  
@@ -108,9 +130,11 @@ class ReportExporter:
         # Categorical columns summary  
         categorical_cols = df.select_dtypes(include=['object']).columns  
         for col in categorical_cols:  
+            # One unsorted hash pass gives both the distinct count and the top 5 (partial selection, no full sort)
+            counts = df[col].value_counts(sort=False)  
             summary['categorical_summary'][col] = {  
-                'unique_count': df[col].nunique(),  
-                'top_values': df[col].value_counts().head(5).to_dict(),  
+                'unique_count': len(counts),  
+                'top_values': counts.nlargest(5).to_dict(),  
                 'missing_count': df[col].isnull().sum()  
             }  
           